@@ -28,6 +28,7 @@ INSTALL_REQUIRES = [
     'unicodecsv>=0.14',
     'tableschema>=1.0',
     'tabulator>=1.0',
+    'futures>=3.0; python_version<"3"',
 ]
 TESTS_REQUIRE = [
     'mock',
@@ -50,7 +51,8 @@ setup(
     include_package_data=True,
     install_requires=INSTALL_REQUIRES,
     tests_require=TESTS_REQUIRE,
-    extras_require={'develop': TESTS_REQUIRE},
+    extras_require={'develop': TESTS_REQUIRE, 'avro': ['fastavro>=0.22'],
+                    'pandas': ['pandas>=1.0']},
     zip_safe=False,
     long_description=README,
     long_description_content_type='text/markdown',
@@ -8,7 +8,15 @@ from __future__ import unicode_literals
 
 # Module API
 
+import sys
 from .storage import Storage
+from .cache import MetadataCache
+from .encoders import Encoder
+from .sinks import Sink, LocalSink, GcsSink
+from .transport import HttpPool
+from .tracing import Tracer, MetricsTracer
+if sys.version_info >= (3, 6):
+    from .async_storage import AsyncStorage
 
 
 # Version
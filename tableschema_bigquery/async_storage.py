@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from .storage import Storage
+
+
+# Module API
+
+class AsyncStorage(object):
+    """BigQuery storage for asyncio (Python 3.6+)
+
+    It has the same API as `Storage` but its methods are coroutines and
+    `iter` is an asynchronous generator. Blocking API calls run in a pool
+    of `concurrency` threads so many buckets could be read and written
+    concurrently from one event loop. Every thread gets its own HTTP
+    transport (see the `http_pool` option of `Storage`).
+
+    # Arguments
+        service (object): BigQuery `Service` object
+        project (str): BigQuery project name
+        dataset (str): BigQuery dataset name
+        prefix (str): prefix for all buckets
+        concurrency (int): max number of operations running at the same time
+        options (dict): other `Storage` options
+
+    """
+
+    # Public
+
+    def __init__(self, service, project, dataset, prefix='', concurrency=10, **options):
+        self.__storage = Storage(service, project, dataset, prefix=prefix, **options)
+        self.__executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def __repr__(self):
+        return 'Async%r' % self.__storage
+
+    @property
+    def storage(self):
+        """Underlying synchronous storage
+        """
+        return self.__storage
+
+    async def buckets(self):
+        """Get buckets (see `Storage.buckets`)
+        """
+        return await self.__run(lambda: self.__storage.buckets)
+
+    async def create(self, bucket, descriptor, **options):
+        """Create buckets (see `Storage.create`)
+        """
+        return await self.__run(self.__storage.create, bucket, descriptor, **options)
+
+    async def delete(self, bucket=None, **options):
+        """Delete buckets (see `Storage.delete`)
+        """
+        return await self.__run(self.__storage.delete, bucket, **options)
+
+    async def describe(self, bucket, descriptor=None):
+        """Get or set bucket descriptor (see `Storage.describe`)
+        """
+        return await self.__run(self.__storage.describe, bucket, descriptor)
+
+    async def iter(self, bucket, rows_per_batch=1000, **options):
+        """Iterate over bucket rows (see `Storage.iter`)
+
+        Rows are taken from the underlying iterator in a thread
+        by batches of `rows_per_batch` rows.
+
+        """
+        async for row in self.__iter_rows(self.__storage.iter, bucket, rows_per_batch, **options):
+            yield row
+
+    async def read(self, bucket, **options):
+        """Read bucket rows (see `Storage.read`)
+        """
+        return await self.__run(self.__storage.read, bucket, **options)
+
+    async def read_dataframe(self, bucket, **options):
+        """Read bucket rows to a pandas DataFrame (see `Storage.read_dataframe`)
+        """
+        return await self.__run(self.__storage.read_dataframe, bucket, **options)
+
+    async def query(self, bucket, rows_per_batch=1000, **options):
+        """Query bucket rows (see `Storage.query`)
+
+        Rows are taken from the underlying iterator in a thread
+        by batches of `rows_per_batch` rows.
+
+        """
+        async for row in self.__iter_rows(self.__storage.query, bucket, rows_per_batch, **options):
+            yield row
+
+    async def write(self, bucket, rows, **options):
+        """Write rows to bucket and wait for jobs (see `Storage.write`)
+        """
+        return await self.__run(self.__storage.write, bucket, rows, **options)
+
+    async def write_dataframe(self, bucket, dataframe, **options):
+        """Write pandas DataFrame to bucket (see `Storage.write_dataframe`)
+        """
+        return await self.__run(self.__storage.write_dataframe, bucket, dataframe, **options)
+
+    def close(self):
+        """Shutdown the thread pool
+        """
+        self.__executor.shutdown()
+
+    # Private
+
+    async def __run(self, function, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.__executor, partial(function, *args, **kwargs))
+
+    async def __iter_rows(self, function, bucket, rows_per_batch, **options):
+        iterator = await self.__run(function, bucket, **options)
+        while True:
+            rows = await self.__run(_take_rows, iterator, rows_per_batch)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+
+# Internal
+
+def _take_rows(iterator, count):
+    rows = []
+    for row in iterator:
+        rows.append(row)
+        if len(rows) >= count:
+            break
+    return rows
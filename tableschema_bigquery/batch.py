@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import time
+import random
+from apiclient.errors import HttpError
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Module API
+
+def execute_requests(service, requests, batch_size=None, workers=1, num_retries=0,
+                     http_pool=None):
+    """Execute many API requests
+
+    Requests are grouped into HTTP batch requests of `batch_size` calls
+    if the service supports batching. Calls failed with a retryable error
+    (`429` or `5xx`) are sent again in new batches with exponential backoff.
+    Otherwise requests are executed one by one (using `workers` threads).
+
+    # Arguments
+        service (object): BigQuery `Service` object
+        requests (object[]): not executed API requests
+        batch_size (int): max number of calls in a batch (batching is disabled if not set)
+        workers (int): number of threads for not batched requests
+        num_retries (int): number of retries for a failed request
+        http_pool (HttpPool): pool of HTTP transports for concurrent use of the service
+
+    # Returns
+        tuple[]: `(response, exception)` pairs in the order of requests
+
+    """
+    requests = list(requests)
+
+    # Batch requests
+    if batch_size and len(requests) > 1 and hasattr(service, 'new_batch_http_request'):
+        return _execute_batches(service, requests, batch_size, num_retries, http_pool)
+
+    # Single requests
+    def execute(request):
+        try:
+            response = request.execute(http=_get_http(http_pool), num_retries=num_retries)
+            return (response, None)
+        except Exception as exception:
+            return (None, exception)
+
+    if workers <= 1 or len(requests) <= 1:
+        return [execute(request) for request in requests]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(execute, requests))
+
+
+# Internal
+
+def _execute_batches(service, requests, batch_size, num_retries, http_pool):
+    results = {}
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    # Send failed calls again (with backoff like the client does for single requests)
+    indexes = list(range(len(requests)))
+    for retry in range(num_retries + 1):
+        if retry:
+            time.sleep(random.random() * 2 ** retry)
+        for start in range(0, len(indexes), batch_size):
+            batch = service.new_batch_http_request(callback=callback)
+            for index in indexes[start:start + batch_size]:
+                batch.add(requests[index], request_id=str(index))
+            batch.execute(http=_get_http(http_pool))
+        indexes = [index for index in indexes if _is_retryable(results[index][1])]
+        if not indexes:
+            break
+
+    return [results[index] for index in range(len(requests))]
+
+
+def _is_retryable(exception):
+    if not isinstance(exception, HttpError):
+        return False
+    status = int(exception.resp.status)
+    return status == 429 or status >= 500
+
+
+def _get_http(http_pool):
+    return http_pool.get() if http_pool is not None else None
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import io
+import json
+import time
+import tempfile
+import threading
+import tableschema
+
+
+# Module API
+
+class MetadataCache(object):
+    """Cache for BigQuery metadata (table lists and schemas)
+
+    Entries expire after `ttl` seconds. If `path` is provided entries
+    are persisted to a local JSON file so other processes start warm.
+    The file is re-read and merged (newer entries win) on every change
+    so processes sharing it don't drop each other's entries. A persisted
+    cache requires `ttl` because tables could be changed by other clients.
+
+    # Arguments
+        ttl (float): time to live of an entry in seconds (no expiration by default)
+        path (str): path to a JSON file to persist the cache
+
+    # Raises
+        tableschema.exceptions.StorageError: if `path` is provided without `ttl`
+
+    """
+
+    # Public
+
+    def __init__(self, ttl=None, path=None):
+        if path and ttl is None:
+            message = 'Metadata cache persisted to "%s" requires a ttl' % path
+            raise tableschema.exceptions.StorageError(message)
+        self.__ttl = ttl
+        self.__path = path
+        self.__entries = {}
+        self.__lock = threading.Lock()
+        self.__merge()
+
+    def get(self, key):
+        """Get entry
+
+        # Arguments
+            key (str): entry key
+
+        # Returns
+            any: entry value or None if it's missing or expired
+
+        """
+        entry = self.__entries.get(key)
+        if entry is None or self.__is_expired(entry):
+            return None
+        return entry[1]
+
+    def set(self, key, value):
+        """Set entry
+
+        # Arguments
+            key (str): entry key
+            value (any): JSON serializable entry value
+
+        """
+        self.set_many({key: value})
+
+    def set_many(self, items):
+        """Set many entries saving the file once
+
+        # Arguments
+            items (dict): JSON serializable entry values by key
+
+        """
+        timestamp = time.time()
+        with self.__lock:
+            self.__merge()
+            for key, value in items.items():
+                self.__entries[key] = [timestamp, value]
+            self.__save()
+
+    def invalidate(self, key=None):
+        """Remove entry or all the entries
+
+        # Arguments
+            key (str): entry key (all entries are removed if not provided)
+
+        """
+        with self.__lock:
+            self.__merge()
+            if key is None:
+                self.__entries = {}
+            else:
+                self.__entries.pop(key, None)
+            self.__save()
+
+    # Private
+
+    def __is_expired(self, entry):
+        return self.__ttl is not None and time.time() - entry[0] > self.__ttl
+
+    def __merge(self):
+        if not self.__path or not os.path.exists(self.__path):
+            return
+        with io.open(self.__path, encoding='utf-8') as file:
+            entries = json.load(file)
+        for key, entry in entries.items():
+            if key not in self.__entries or entry[0] > self.__entries[key][0]:
+                self.__entries[key] = entry
+
+    def __save(self):
+        if not self.__path:
+            return
+        for key, entry in list(self.__entries.items()):
+            if self.__is_expired(entry):
+                del self.__entries[key]
+        directory = os.path.dirname(os.path.abspath(self.__path))
+        handle, path = tempfile.mkstemp(dir=directory)
+        with io.open(handle, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(self.__entries, ensure_ascii=False))
+        getattr(os, 'replace', os.rename)(path, self.__path)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import json
+import tableschema
+
+
+# Module API
+
+def import_pandas():
+    """Import pandas
+
+    # Raises
+        tableschema.exceptions.StorageError: if pandas is not installed
+
+    # Returns
+        module: pandas
+
+    """
+    try:
+        import pandas
+    except ImportError:
+        message = 'DataFrame support requires "pandas" package to be installed'
+        raise tableschema.exceptions.StorageError(message)
+    return pandas
+
+
+def restore_frame(rows, schema):
+    """Restore BigQuery rows to a DataFrame column by column
+
+    Integers are restored to `Int64`, numbers to `float64`, booleans to
+    `boolean`, dates and datetimes to `datetime64` and times to `timedelta64`
+    columns. Other values stay strings.
+
+    # Arguments
+        rows (list[]): rows of BigQuery values
+        schema (tableschema.Schema): schema
+
+    # Returns
+        pandas.DataFrame: data frame
+
+    """
+    pandas = import_pandas()
+    columns = list(zip(*rows)) or [[] for field in schema.fields]
+    data = {}
+    for field, column in zip(schema.fields, columns):
+        series = pandas.Series(column, dtype=object)
+        data[field.name] = _restore_series(pandas, series, field)
+    return pandas.DataFrame(data, columns=schema.field_names)
+
+
+def encode_frame(frame, schema, stream):
+    """Encode DataFrame to CSV column by column
+
+    # Arguments
+        frame (pandas.DataFrame): data frame having columns of all schema fields
+        schema (tableschema.Schema): schema
+        stream (file): binary stream to write to
+
+    """
+    pandas = import_pandas()
+    data = {}
+    for field in schema.fields:
+        data[field.name] = _convert_series(pandas, frame[field.name], field)
+    frame = pandas.DataFrame(data, columns=schema.field_names)
+    text = frame.to_csv(header=False, index=False, na_rep='')
+    stream.write(text.encode('utf-8'))
+
+
+# Internal
+
+def _restore_series(pandas, series, field):
+
+    # Integer (missing values are masked to keep big integers exact)
+    if field.type in ['integer', 'year']:
+        missing = series.isna()
+        values = pandas.to_numeric(series.where(~missing, '0')).astype('Int64')
+        return values.mask(missing)
+
+    # Number
+    if field.type == 'number':
+        return pandas.to_numeric(series).astype('float64')
+
+    # Boolean
+    if field.type == 'boolean':
+        return series.map(_BOOLEANS).astype('boolean')
+
+    # Datetime (timestamps are returned as epoch seconds)
+    if field.type == 'datetime':
+        values = series.dropna()
+        if len(values) and _is_epoch(values.iloc[0]):
+            return pandas.to_datetime(pandas.to_numeric(series), unit='s')
+        return pandas.to_datetime(series, **_get_iso_options(pandas))
+
+    # Date
+    if field.type == 'date':
+        return pandas.to_datetime(series, **_get_iso_options(pandas))
+
+    # Time
+    if field.type == 'time':
+        return pandas.to_timedelta(series)
+
+    return series
+
+
+def _convert_series(pandas, series, field):
+    kind = series.dtype.kind
+
+    # Integer (missing values turn integer columns into floats)
+    if field.type in ['integer', 'year'] and kind == 'f':
+        return series.astype('Int64')
+
+    # Date
+    if field.type == 'date' and kind == 'M':
+        return series.dt.strftime('%Y-%m-%d')
+
+    # Datetime (timezone aware values are converted to UTC)
+    if field.type == 'datetime' and kind == 'M':
+        if getattr(series.dt, 'tz', None) is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        return series.dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+    # Time
+    if field.type == 'time' and kind == 'm':
+        return (pandas.Timestamp(0) + series).dt.strftime('%H:%M:%S.%f')
+
+    # Objects and arrays
+    if kind == 'O' and field.type in ['object', 'array', 'geojson']:
+        return series.map(_dump_value)
+
+    return series
+
+
+def _is_epoch(value):
+    # DATETIME is emitted as YYYY-MM-DDTHH:MM:SS[.ffffff] (epoch could be negative)
+    return len(value) < 19 or value[4] != '-'
+
+
+def _get_iso_options(pandas):
+    # pandas 2 infers one format from the first value (fractions are optional)
+    if int(pandas.__version__.split('.')[0]) >= 2:
+        return {'format': 'ISO8601'}
+    return {}
+
+
+def _dump_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+_BOOLEANS = {'true': True, 'false': False}
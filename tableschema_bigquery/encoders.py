@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import json
+import datetime
+import decimal
+import six
+import unicodecsv
+import tableschema
+
+
+# Module API
+
+class Encoder(object):
+    """Encoder to serialize converted rows into a load job payload
+
+    Subclasses set `source_format` (and optional load job `options`)
+    and implement `write`. An encoder is created for every chunk.
+
+    # Arguments
+        stream (file): binary stream to write to
+        converted_descriptor (dict): BigQuery descriptor
+
+    """
+
+    # Public
+
+    source_format = None
+    options = {}
+
+    def __init__(self, stream, converted_descriptor):
+        self.stream = stream
+        self.converted_descriptor = converted_descriptor
+
+    def write(self, row):
+        """Write converted row
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """Flush encoded rows to the stream
+        """
+        pass
+
+
+class CsvEncoder(Encoder):
+    """CSV encoder
+    """
+
+    # Public
+
+    source_format = 'CSV'
+
+    def __init__(self, stream, converted_descriptor):
+        super(CsvEncoder, self).__init__(stream, converted_descriptor)
+        self.__writer = unicodecsv.writer(stream, encoding='utf-8')
+
+    def write(self, row):
+        self.__writer.writerow(row)
+
+
+class JsonEncoder(Encoder):
+    """Newline-delimited JSON encoder
+    """
+
+    # Public
+
+    source_format = 'NEWLINE_DELIMITED_JSON'
+
+    def __init__(self, stream, converted_descriptor):
+        super(JsonEncoder, self).__init__(stream, converted_descriptor)
+        self.__names = [field['name'] for field in converted_descriptor['fields']]
+
+    def write(self, row):
+        line = self.dumps(dict(zip(self.__names, row)))
+        self.stream.write(line.encode('utf-8') + b'\n')
+
+    def convert(self, row):
+        """Convert row to JSON compatible record
+        """
+        record = {}
+        for name, value in zip(self.__names, row):
+            if value is not None and not isinstance(value, _JSON_TYPES):
+                value = _serialize_value(value)
+            record[name] = value
+        return record
+
+    def dumps(self, record):
+        """Dump record to JSON line
+        """
+        return json.dumps(record, default=_serialize_value, ensure_ascii=False)
+
+
+class AvroEncoder(Encoder):
+    """Avro encoder (requires `fastavro`)
+    """
+
+    # Public
+
+    source_format = 'AVRO'
+    options = {'useAvroLogicalTypes': True}
+
+    def __init__(self, stream, converted_descriptor):
+        super(AvroEncoder, self).__init__(stream, converted_descriptor)
+        try:
+            import fastavro
+        except ImportError:
+            message = 'Avro format requires "fastavro" package to be installed'
+            raise tableschema.exceptions.StorageError(message)
+        fields = converted_descriptor['fields']
+        schema = fastavro.parse_schema(_convert_avro_schema(fields))
+        self.__converters = [_AVRO_CONVERTERS.get(field['type']) for field in fields]
+        self.__names = [field['name'] for field in fields]
+        self.__writer = fastavro.write.Writer(stream, schema)
+
+    def write(self, row):
+        record = {}
+        for name, converter, value in zip(self.__names, self.__converters, row):
+            if converter is not None and value is not None:
+                value = converter(value)
+            record[name] = value
+        self.__writer.write(record)
+
+    def close(self):
+        self.__writer.flush()
+
+
+ENCODERS = {
+    'csv': CsvEncoder,
+    'json': JsonEncoder,
+    'avro': AvroEncoder,
+}
+
+
+# Internal
+
+_AVRO_TYPES = {
+    'BOOLEAN': 'boolean',
+    'DATE': {'type': 'int', 'logicalType': 'date'},
+    'DATETIME': {'type': 'string', 'logicalType': 'datetime'},
+    'FLOAT': 'double',
+    'INTEGER': 'long',
+    'STRING': 'string',
+    'TIME': {'type': 'long', 'logicalType': 'time-micros'},
+}
+
+_AVRO_CONVERTERS = {
+    'DATETIME': str,
+    'FLOAT': float,
+}
+
+_JSON_TYPES = six.string_types + six.integer_types + (float, bool, list, dict)
+
+
+def _convert_avro_schema(fields):
+    avro_fields = []
+    for field in fields:
+        avro_type = _AVRO_TYPES[field['type']]
+        if field.get('mode', 'NULLABLE') == 'NULLABLE':
+            avro_type = ['null', avro_type]
+        avro_fields.append({'name': field['name'], 'type': avro_type})
+    return {'type': 'record', 'name': 'Row', 'fields': avro_fields}
+
+
+def _serialize_value(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return str(value)
+    message = 'Value "%r" is not JSON serializable' % value
+    raise TypeError(message)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import time
+import random
+import tableschema
+from .batch import execute_requests
+from .tracing import Tracer
+
+
+# Module API
+
+class JobWaiter(object):
+    """Waiter for BigQuery jobs
+
+    Outstanding jobs are polled together in one loop. Delays between polls
+    grow exponentially (with jitter) from `initial_delay` to `max_delay`.
+
+    # Arguments
+        service (object): BigQuery `Service` object
+        initial_delay (float): first delay between polls in seconds
+        max_delay (float): max delay between polls in seconds
+        multiplier (float): delay multiplier applied after every poll
+        jitter (float): max fraction of a delay to be randomly subtracted
+        timeout (float): max time to wait for jobs in seconds
+        num_retries (int): number of retries for a failed poll request
+        batch_size (int):
+            max number of polls grouped into one HTTP batch request
+            (batching is disabled if not set)
+        http_pool (HttpPool): pool of HTTP transports for concurrent use of the service
+        tracer (Tracer): tracer to record `storage.wait` spans to
+
+    """
+
+    # Public
+
+    def __init__(self, service, initial_delay=0.1, max_delay=10, multiplier=1.5,
+                 jitter=0.5, timeout=None, num_retries=5, batch_size=None,
+                 http_pool=None, tracer=None):
+        self.__service = service
+        self.__initial_delay = initial_delay
+        self.__max_delay = max_delay
+        self.__multiplier = multiplier
+        self.__jitter = jitter
+        self.__timeout = timeout
+        self.__num_retries = num_retries
+        self.__batch_size = batch_size
+        self.__http_pool = http_pool
+        self.__tracer = tracer or Tracer()
+
+    def wait(self, job):
+        """Wait for a job
+
+        # Arguments
+            job (dict): job resource returned by `jobs().insert`
+
+        # Raises
+            tableschema.exceptions.StorageError: if the job fails or the timeout expires
+
+        # Returns
+            dict: finished job resource
+
+        """
+        return self.wait_all([job])[0]
+
+    def wait_all(self, jobs):
+        """Wait for many jobs
+
+        All the jobs are awaited even if some of them fail.
+
+        # Arguments
+            jobs (dict[]): job resources returned by `jobs().insert`
+
+        # Raises
+            tableschema.exceptions.StorageError:
+                if any of the jobs fails or the timeout expires
+
+        # Returns
+            dict[]: finished job resources in the same order
+
+        """
+        with self.__start_span(jobs) as span:
+            results = self.__poll(jobs, span, max_pending=0)
+            errors = get_job_errors(results)
+            if errors:
+                message = '\n'.join(errors)
+                raise tableschema.exceptions.StorageError(message)
+        return results
+
+    def wait_some(self, jobs, max_pending):
+        """Wait until no more than `max_pending` jobs are unfinished
+
+        Failed jobs are not raised but returned among the finished ones
+        (see `get_job_errors`).
+
+        # Arguments
+            jobs (dict[]): job resources returned by `jobs().insert`
+            max_pending (int): max number of jobs to be left unfinished
+
+        # Raises
+            tableschema.exceptions.StorageError: if the timeout expires
+
+        # Returns
+            (dict[], dict[]): finished and unfinished job resources
+
+        """
+        with self.__start_span(jobs) as span:
+            results = self.__poll(jobs, span, max_pending=max_pending)
+        finished = [result for result in results if _is_done(result)]
+        unfinished = [result for result in results if not _is_done(result)]
+        return finished, unfinished
+
+    # Private
+
+    def __start_span(self, jobs):
+        ids = [job['jobReference']['jobId'] for job in jobs]
+        attributes = {'jobs': len(ids), 'job_ids': ids, 'polls': 0}
+        return self.__tracer.start_as_current_span('storage.wait', attributes=attributes)
+
+    def __poll(self, jobs, span, max_pending):
+
+        # Prepare state
+        results = list(jobs)
+        pending = [index for index, job in enumerate(jobs) if not _is_done(job)]
+        delay = self.__initial_delay
+        start = time.time()
+        polls = 0
+
+        # Poll pending jobs
+        while len(pending) > max_pending:
+            if self.__timeout is not None and time.time() - start + delay > self.__timeout:
+                ids = ', '.join(results[index]['jobReference']['jobId'] for index in pending)
+                message = 'Timeout expired waiting for jobs: %s' % ids
+                raise tableschema.exceptions.StorageError(message)
+            time.sleep(delay * (1 - random.random() * self.__jitter))
+            delay = min(delay * self.__multiplier, self.__max_delay)
+            requests = [self.__get_request(results[index]) for index in pending]
+            responses = execute_requests(
+                self.__service, requests, batch_size=self.__batch_size,
+                num_retries=self.__num_retries, http_pool=self.__http_pool)
+            polls += len(requests)
+            span.set_attribute('polls', polls)
+            for index, (response, error) in list(zip(pending, responses)):
+                if error is not None:
+                    raise error
+                results[index] = response
+                if _is_done(response):
+                    pending.remove(index)
+
+        return results
+
+    def __get_request(self, job):
+        return self.__service.jobs().get(
+            projectId=job['jobReference']['projectId'],
+            jobId=job['jobReference']['jobId'])
+
+
+def get_job_errors(jobs):
+    """Get error messages of jobs
+
+    # Arguments
+        jobs (dict[]): job resources
+
+    # Returns
+        str[]: error messages
+
+    """
+    errors = []
+    for job in jobs:
+        for error in job.get('status', {}).get('errors', []):
+            errors.append(error['message'])
+    return errors
+
+
+# Internal
+
+def _is_done(job):
+    return job.get('status', {}).get('state') == 'DONE'
@@ -5,8 +5,12 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import re
+import six
 import json
+import datetime
+import itertools
 import tableschema
+from decimal import Decimal
 from slugify import slugify
 from dateutil.parser import parse
 
@@ -21,11 +25,22 @@ class Mapper(object):
         """Mapper to convert/restore FD entities to/from BigQuery entities
         """
         self.__prefix = prefix
+        self.__converter = (None, None, None)
+        self.__restorer = (None, None)
 
     def convert_bucket(self, bucket):
         """Convert bucket to BigQuery
         """
-        return self.__prefix + bucket
+        table_name = self.__prefix + bucket
+        if table_name.startswith(_STAGING_PREFIX):
+            message = 'Table name "%s" is reserved for staging tables' % table_name
+            raise tableschema.exceptions.StorageError(message)
+        return table_name
+
+    def convert_staging_table(self, table_name, suffix):
+        """Convert table name to a name of its staging table
+        """
+        return '%s%s_%s' % (_STAGING_PREFIX, table_name, suffix)
 
     def convert_descriptor(self, descriptor):
         """Convert descriptor to BigQuery
@@ -44,7 +59,7 @@ class Mapper(object):
             if field.required:
                 mode = 'REQUIRED'
             fields.append({
-                'name': _slugify_field_name(field.name),
+                'name': self.convert_field_name(field.name),
                 'type': converted_type,
                 'mode': mode,
             })
@@ -56,17 +71,108 @@ class Mapper(object):
 
         return (converted_descriptor, fallbacks)
 
+    def convert_table_options(self, descriptor, partitioning=None, clustering=None):
+        """Convert partitioning and clustering hints to BigQuery table options
+
+        Hints are taken from the arguments or from the descriptor's
+        `partitioning` and `clustering` properties.
+
+        # Arguments
+            descriptor (dict): descriptor
+            partitioning (str/dict):
+                name of a date/datetime field for daily time partitioning or
+                a dict with a `field` and either a time partitioning `type`
+                (`DAY`, `HOUR`, `MONTH` or `YEAR`, daily by default) or
+                an integer `range` (`start`, `end` and `interval`);
+                other keys (e.g. `expirationMs`) are passed as is
+            clustering (bool/str[]):
+                names of up to 4 fields to cluster by
+                (`True` to cluster by the primary key)
+
+        # Raises
+            tableschema.exceptions.StorageError: if hints are not valid
+
+        # Returns
+            dict: table resource options
+
+        """
+        options = {}
+        schema = tableschema.Schema(descriptor)
+        if partitioning is None:
+            partitioning = descriptor.get('partitioning')
+        if clustering is None:
+            clustering = descriptor.get('clustering')
+
+        # Partitioning
+        if partitioning:
+            options.update(_convert_partitioning(partitioning, schema))
+
+        # Clustering
+        if clustering:
+            options['clustering'] = _convert_clustering(clustering, schema)
+
+        return options
+
+    def convert_field_name(self, name):
+        """Convert field name to BigQuery
+        """
+        return _slugify_field_name(name)
+
     def convert_row(self, row, schema, fallbacks):
         """Convert row to BigQuery
         """
+        return self.compile_row_converter(schema, fallbacks)(row)
+
+    def compile_row_converter(self, schema, fallbacks, cast=True, validate_every=None):
+        """Compile row converter to BigQuery
+
+        The converter is a tuple of per-field cast functions applied to
+        every row. Values already having the target type are passed through
+        for fields without format and constraints. The last compiled
+        converter is cached for the given schema and options.
+
+        If `cast` is disabled rows are trusted to be already typed and only
+        fallback fields are serialized. The first row and then every
+        `validate_every`-th row are still cast to catch wrong types.
+
+        # Arguments
+            schema (tableschema.Schema): schema
+            fallbacks (int[]): indexes of fields converted to strings
+            cast (bool): cast values with the schema
+            validate_every (int): cast every N-th row if casting is disabled
+
+        # Returns
+            func: function converting a row to a new row
+
+        """
+
+        # Cached converter
+        options = (list(fallbacks), cast, validate_every)
+        cached_schema, cached_options, converter = self.__converter
+        if cached_schema is schema and cached_options == options:
+            return converter
+
+        # Compile converter
+        casts = []
         for index, field in enumerate(schema.fields):
-            value = row[index]
             if index in fallbacks:
-                value = _uncast_value(value, field=field)
+                casts.append(_compile_uncast(field))
             else:
-                value = field.cast_value(value)
-            row[index] = value
-        return row
+                casts.append(_compile_cast(field))
+        casts = tuple(casts)
+
+        def converter(row):
+            _check_row_length(row, len(casts))
+            return [cast(value) for cast, value in zip(casts, row)]
+
+        # Compile trusting converter
+        if not cast:
+            converter = _compile_trusting_converter(
+                converter, [(index, casts[index]) for index in fallbacks], len(casts),
+                validate_every)
+
+        self.__converter = (schema, options, converter)
+        return converter
 
     def convert_type(self, type):
         """Convert type to BigQuery
@@ -101,6 +207,8 @@ class Mapper(object):
     def restore_bucket(self, table_name):
         """Restore bucket from BigQuery
         """
+        if table_name.startswith(_STAGING_PREFIX):
+            return None
         if table_name.startswith(self.__prefix):
             return table_name.replace(self.__prefix, '', 1)
         return None
@@ -127,14 +235,43 @@ class Mapper(object):
     def restore_row(self, row, schema):
         """Restore row from BigQuery
         """
-        for index, field in enumerate(schema.fields):
-            if field.type == 'datetime':
-                row[index] = parse(row[index])
-            if field.type == 'date':
-                row[index] = parse(row[index]).date()
-            if field.type == 'time':
-                row[index] = parse(row[index]).time()
-        return schema.cast_row(row)
+        return self.restore_rows([row], schema=schema)[0]
+
+    def restore_rows(self, rows, schema, validate=True):
+        """Restore rows from BigQuery
+
+        Rows are decoded column by column with parsers compiled once
+        per schema (fixed-format parsers for temporal types).
+
+        # Arguments
+            rows (list[]): BigQuery rows (e.g. a page of `tabledata().list`)
+            schema (tableschema.Schema): schema
+            validate (bool): cast restored rows with `schema.cast_row`
+
+        # Returns
+            list[]: restored rows
+
+        """
+
+        # Get parsers
+        cached_schema, parsers = self.__restorer
+        if cached_schema is not schema:
+            parsers = tuple(_compile_restore(field) for field in schema.fields)
+            self.__restorer = (schema, parsers)
+
+        # Restore columns
+        columns = []
+        for parser, column in zip(parsers, zip(*rows)):
+            if parser is not None:
+                column = [parser(value) if value is not None else None for value in column]
+            columns.append(column)
+        rows = [list(row) for row in zip(*columns)] if columns else [[] for row in rows]
+
+        # Validate rows
+        if validate:
+            rows = [schema.cast_row(row) for row in rows]
+
+        return rows
 
     def restore_type(self, type):
         """Restore type from BigQuery
@@ -149,6 +286,7 @@ class Mapper(object):
             'FLOAT': 'number',
             'STRING': 'string',
             'TIME': 'time',
+            'TIMESTAMP': 'datetime',
         }
 
         # Not supported type
@@ -161,6 +299,48 @@ class Mapper(object):
 
 # Internal
 
+def _convert_partitioning(partitioning, schema):
+
+    # Field
+    if isinstance(partitioning, six.string_types):
+        partitioning = {'field': partitioning}
+    partitioning = dict(partitioning)
+    field = schema.get_field(partitioning.get('field'))
+    if field is None:
+        message = 'Partitioning field "%s" doesn\'t exist' % partitioning.get('field')
+        raise tableschema.exceptions.StorageError(message)
+    partitioning['field'] = _slugify_field_name(field.name)
+
+    # Range partitioning
+    if 'range' in partitioning:
+        if field.type != 'integer':
+            message = 'Range partitioning field "%s" is not integer' % field.name
+            raise tableschema.exceptions.StorageError(message)
+        return {'rangePartitioning': partitioning}
+
+    # Time partitioning
+    if field.type not in ['date', 'datetime']:
+        message = 'Time partitioning field "%s" is not date/datetime' % field.name
+        raise tableschema.exceptions.StorageError(message)
+    partitioning.setdefault('type', 'DAY')
+    return {'timePartitioning': partitioning}
+
+
+def _convert_clustering(clustering, schema):
+    if clustering is True:
+        clustering = schema.primary_key
+    if isinstance(clustering, six.string_types):
+        clustering = [clustering]
+    if not clustering or len(clustering) > 4:
+        message = 'Clustering requires from 1 to 4 fields'
+        raise tableschema.exceptions.StorageError(message)
+    for name in clustering:
+        if name not in schema.field_names:
+            message = 'Clustering field "%s" doesn\'t exist' % name
+            raise tableschema.exceptions.StorageError(message)
+    return {'fields': [_slugify_field_name(name) for name in clustering]}
+
+
 def _slugify_field_name(name):
 
     # Referene:
@@ -177,6 +357,129 @@ def _slugify_field_name(name):
     return name[:MAX_LENGTH]
 
 
+_PYTHON_TYPES = {
+    'boolean': bool,
+    'date': datetime.date,
+    'datetime': datetime.datetime,
+    'integer': int,
+    'number': Decimal,
+    'string': six.text_type,
+    'time': datetime.time,
+    'year': int,
+}
+_STAGING_PREFIX = '_staging_'
+
+
+def _compile_cast(field):
+    python_type = _PYTHON_TYPES.get(field.type)
+    if python_type is None or field.constraints or field.format != 'default':
+        return field.cast_value
+    missing_values = field.missing_values if python_type is six.text_type else []
+
+    def cast(value):
+        if value is None or (type(value) is python_type and value not in missing_values):
+            return value
+        return field.cast_value(value)
+
+    return cast
+
+
+def _compile_restore(field):
+    if field.type in ['integer', 'year']:
+        return _compile_restore_number(int, field)
+    if field.type == 'number':
+        return _compile_restore_number(Decimal, field)
+    if field.type == 'boolean':
+        return _restore_boolean
+    if field.type == 'datetime':
+        return _restore_datetime
+    if field.type == 'date':
+        return _restore_date
+    if field.type == 'time':
+        return _restore_time
+    if field.type in ['string', 'any']:
+        return None
+    return field.cast_value
+
+
+def _compile_restore_number(parse_number, field):
+
+    def restore(value):
+        try:
+            return parse_number(value)
+        except (ValueError, ArithmeticError):
+            return field.cast_value(value)
+
+    return restore
+
+
+def _restore_boolean(value):
+    if value in ['true', 'false']:
+        return value == 'true'
+    return value
+
+
+def _restore_datetime(value):
+    # TIMESTAMP is emitted as epoch seconds
+    # DATETIME is emitted as YYYY-MM-DDTHH:MM:SS[.ffffff]
+    try:
+        if len(value) < 19 or value[4] != '-':
+            return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=float(value))
+        return datetime.datetime.combine(_restore_date(value[:10]), _restore_time(value[11:]))
+    except ValueError:
+        return parse(value)
+
+
+def _restore_date(value):
+    # DATE is emitted as YYYY-MM-DD
+    try:
+        if len(value) != 10:
+            raise ValueError(value)
+        return datetime.date(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+    except ValueError:
+        return parse(value).date()
+
+
+def _restore_time(value):
+    # TIME is emitted as HH:MM:SS[.ffffff]
+    try:
+        if len(value) < 8 or value[2] != ':' or value[5] != ':':
+            raise ValueError(value)
+        microsecond = int(value[9:15].ljust(6, '0')) if len(value) > 9 else 0
+        return datetime.time(int(value[0:2]), int(value[3:5]), int(value[6:8]), microsecond)
+    except ValueError:
+        return parse(value).time()
+
+
+def _compile_trusting_converter(cast_converter, uncasts, size, validate_every=None):
+    counter = itertools.count()
+
+    def converter(row):
+        if validate_every and next(counter) % validate_every == 0:
+            return cast_converter(row)
+        row = list(row)
+        _check_row_length(row, size)
+        for index, uncast in uncasts:
+            row[index] = uncast(row[index])
+        return row
+
+    return converter
+
+
+def _check_row_length(row, size):
+    if len(row) != size:
+        message = 'Row has %s values but schema has %s fields' % (len(row), size)
+        raise tableschema.exceptions.StorageError(message)
+
+
+def _compile_uncast(field):
+
+    def uncast(value):
+        return _uncast_value(value, field=field)
+
+    return uncast
+
+
 def _uncast_value(value, field):
     # Eventially should be moved to:
     # https://github.com/frictionlessdata/tableschema-py/issues/161
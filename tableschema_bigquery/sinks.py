@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import io
+import glob
+import fnmatch
+import tempfile
+from apiclient.http import MediaIoBaseDownload
+
+
+# Module API
+
+class Sink(object):
+    """Object storage sink to read exported shards from
+
+    Shards are addressed by `gs://bucket/path` URIs. Subclasses
+    implement `list` and `open`.
+
+    """
+
+    # Public
+
+    def list(self, pattern):
+        """List URIs matching a wildcard URI
+
+        # Arguments
+            pattern (str): URI with `*` wildcards
+
+        # Returns
+            str[]: sorted URIs
+
+        """
+        raise NotImplementedError()
+
+    def open(self, uri):
+        """Open URI for reading
+
+        # Arguments
+            uri (str): URI
+
+        # Returns
+            file: binary file-like object
+
+        """
+        raise NotImplementedError()
+
+
+class LocalSink(Sink):
+    """Local directory standing for object storage
+
+    URI `gs://bucket/path` is mapped to `<directory>/bucket/path`.
+
+    # Arguments
+        directory (str): base directory
+
+    """
+
+    # Public
+
+    def __init__(self, directory):
+        self.__directory = directory
+
+    def list(self, pattern):
+        paths = glob.glob(self.get_path(pattern))
+        return sorted(self.__get_uri(path) for path in paths)
+
+    def open(self, uri):
+        return io.open(self.get_path(uri), 'rb')
+
+    def get_path(self, uri):
+        """Get local path for URI
+
+        # Arguments
+            uri (str): URI
+
+        # Returns
+            str: local path
+
+        """
+        _, bucket, name = _parse_uri(uri)
+        return os.path.join(self.__directory, bucket, *name.split('/'))
+
+    # Private
+
+    def __get_uri(self, path):
+        parts = os.path.relpath(path, self.__directory).split(os.sep)
+        return 'gs://%s/%s' % (parts[0], '/'.join(parts[1:]))
+
+
+class GcsSink(Sink):
+    """Google Cloud Storage sink
+
+    # Arguments
+        service (object): Cloud Storage `Service` object
+        spool_size (int):
+            max size in bytes of a downloaded shard
+            held in memory before spilling it to a temporary file
+
+    """
+
+    # Public
+
+    def __init__(self, service, spool_size=8 * 1024 * 1024):
+        self.__service = service
+        self.__spool_size = spool_size
+
+    def list(self, pattern):
+        scheme, bucket, name = _parse_uri(pattern)
+        prefix = name.split('*', 1)[0]
+        uris = []
+        params = {}
+        while True:
+            response = self.__service.objects().list(
+                bucket=bucket, prefix=prefix, **params).execute()
+            for item in response.get('items', []):
+                if fnmatch.fnmatchcase(item['name'], name):
+                    uris.append('%s://%s/%s' % (scheme, bucket, item['name']))
+            if not response.get('nextPageToken'):
+                break
+            params['pageToken'] = response['nextPageToken']
+        return sorted(uris)
+
+    def open(self, uri):
+        _, bucket, name = _parse_uri(uri)
+        file = tempfile.SpooledTemporaryFile(max_size=self.__spool_size)
+        request = self.__service.objects().get_media(bucket=bucket, object=name)
+        downloader = MediaIoBaseDownload(file, request)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+        file.seek(0)
+        return file
+
+
+# Internal
+
+def _parse_uri(uri):
+    scheme, path = uri.split('://', 1)
+    bucket, name = path.split('/', 1)
+    return scheme, bucket, name
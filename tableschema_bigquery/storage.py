@@ -5,12 +5,31 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import io
+import re
 import six
+import json
 import time
+import uuid
+import heapq
+import datetime
+import tempfile
 import unicodecsv
 import tableschema
+from decimal import Decimal
+from functools import partial
+from six.moves import cPickle as pickle
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
+from apiclient.errors import HttpError
 from apiclient.http import MediaIoBaseUpload
+from .batch import execute_requests
+from .cache import MetadataCache
+from .dataframes import import_pandas, restore_frame, encode_frame
+from .encoders import Encoder, CsvEncoder, JsonEncoder, ENCODERS
+from .jobs import JobWaiter, get_job_errors
 from .mapper import Mapper
+from .tracing import Tracer
+from .transport import create_http_pool
 
 
 # Module API
@@ -31,24 +50,59 @@ class Storage(tableschema.Storage):
         project (str): BigQuery project name
         dataset (str): BigQuery dataset name
         prefix (str): prefix for all buckets
+        spool_size (int):
+            max size in bytes of an encoded write chunk
+            held in memory before spilling it to a temporary file
+        upload_chunk_size (int):
+            size in bytes of resumable upload requests
+            (must be a multiple of 256 KB)
+        num_retries (int): number of retries for a failed request
+        job_timeout (float): max time to wait for jobs in seconds
+        cache (MetadataCache):
+            cache for table lists and schemas
+            (in-memory cache without expiration by default)
+        batch_size (int):
+            max number of metadata calls (table creates, deletes, gets and
+            job polls) grouped into one HTTP batch request (`None` to disable)
+        http_pool (HttpPool):
+            pool of HTTP transports making the storage safe to use
+            from many threads (by default a pool of transports authorized
+            like the service's transport is created)
+        tracer (Tracer):
+            tracer to record spans of operations and their phases to
+            (e.g. `MetricsTracer` or an OpenTelemetry tracer)
 
     """
 
     # Public
 
-    def __init__(self, service, project, dataset, prefix=''):
+    def __init__(self, service, project, dataset, prefix='',
+                 spool_size=8 * 1024 * 1024, upload_chunk_size=8 * 1024 * 1024, num_retries=5,
+                 job_timeout=None, cache=None, batch_size=100, http_pool=None,
+                 tracer=None):
 
         # Set attributes
         self.__service = service
         self.__project = project
         self.__dataset = dataset
         self.__prefix = prefix
-        self.__buckets = None
+        self.__cache = cache or MetadataCache()
         self.__descriptors = {}
         self.__fallbacks = {}
+        self.__spool_size = spool_size
+        self.__upload_chunk_size = upload_chunk_size
+        self.__num_retries = num_retries
+        self.__batch_size = batch_size
+        self.__http_pool = http_pool
+        if http_pool is None:
+            self.__http_pool = create_http_pool(service)
+        self.__tracer = tracer or Tracer()
 
-        # Create mapper
+        # Create mapper/waiter
         self.__mapper = Mapper(prefix=prefix)
+        self.__waiter = JobWaiter(
+            service, timeout=job_timeout, num_retries=num_retries,
+            batch_size=batch_size, http_pool=self.__http_pool, tracer=self.__tracer)
 
     def __repr__(self):
 
@@ -64,25 +118,64 @@ class Storage(tableschema.Storage):
     @property
     def buckets(self):
 
-        # No cached value
-        if self.__buckets is None:
+        # Get cached table names
+        key = self.__get_cache_key()
+        table_names = self.__cache.get(key)
+        if table_names is None:
 
-            # Get response
-            response = self.__service.tables().list(
-                projectId=self.__project,
-                datasetId=self.__dataset).execute()
+            # Follow page tokens
+            table_names = []
+            params = {}
+            while True:
+                response = self.__service.tables().list(
+                    projectId=self.__project,
+                    datasetId=self.__dataset,
+                    **params).execute(
+                        http=self.__get_http(), num_retries=self.__num_retries)
+                for table in response.get('tables', []):
+                    table_names.append(table['tableReference']['tableId'])
+                if not response.get('nextPageToken'):
+                    break
+                params['pageToken'] = response['nextPageToken']
+            self.__cache.set(key, table_names)
+
+        # Extract buckets
+        buckets = []
+        for table_name in table_names:
+            bucket = self.__mapper.restore_bucket(table_name)
+            if bucket is not None:
+                buckets.append(bucket)
+
+        return buckets
 
-            # Extract buckets
-            self.__buckets = []
-            for table in response.get('tables', []):
-                table_name = table['tableReference']['tableId']
-                bucket = self.__mapper.restore_bucket(table_name)
-                if bucket is not None:
-                    self.__buckets.append(bucket)
+    def create(self, bucket, descriptor, force=False, workers=1,
+               partitioning=None, clustering=None):
+        """Create buckets
 
-        return self.__buckets
+        Tables could be partitioned and clustered so queries filtering on
+        the partitioning or clustering fields scan only a part of a table.
+        Hints are taken from the arguments (applied to all the buckets) or
+        from the descriptor's `partitioning` and `clustering` properties.
 
-    def create(self, bucket, descriptor, force=False):
+        # Arguments
+            bucket (str/str[]): bucket name or list of bucket names
+            descriptor (dict/dict[]): descriptor or list of descriptors
+            force (bool): delete existent buckets before creation
+            workers (int): number of threads to create tables if batching is disabled
+            partitioning (str/dict):
+                name of a date/datetime field for daily time partitioning or
+                a dict with a `field` and either a time partitioning `type`
+                (`DAY`, `HOUR`, `MONTH` or `YEAR`) or an integer `range`
+                (`start`, `end` and `interval`)
+            clustering (bool/str[]):
+                names of up to 4 fields to cluster by
+                (`True` to cluster by the primary key)
+
+        # Raises
+            tableschema.exceptions.StorageError:
+                if a bucket already exists or partitioning/clustering hints are not valid
+
+        """
 
         # Make lists
         buckets = bucket
@@ -92,17 +185,9 @@ class Storage(tableschema.Storage):
         if isinstance(descriptor, dict):
             descriptors = [descriptor]
 
-        # Iterate over buckets/descriptors
+        # Prepare tables
+        tables = []
         for bucket, descriptor in zip(buckets, descriptors):
-
-            # Existent bucket
-            if bucket in self.buckets:
-                if not force:
-                    message = 'Bucket "%s" already exists' % bucket
-                    raise tableschema.exceptions.StorageError(message)
-                self.delete(bucket)
-
-            # Prepare job body
             tableschema.validate(descriptor)
             table_name = self.__mapper.convert_bucket(bucket)
             converted_descriptor, fallbacks = self.__mapper.convert_descriptor(descriptor)
@@ -114,173 +199,1417 @@ class Storage(tableschema.Storage):
                 },
                 'schema': converted_descriptor,
             }
+            body.update(self.__mapper.convert_table_options(
+                descriptor, partitioning=partitioning, clustering=clustering))
+            tables.append((bucket, descriptor, fallbacks, body))
+
+        # Existent buckets
+        existent = set(self.buckets) & set(buckets)
+        if existent:
+            if not force:
+                bucket = [bucket for bucket in buckets if bucket in existent][0]
+                message = 'Bucket "%s" already exists' % bucket
+                raise tableschema.exceptions.StorageError(message)
+            self.delete([bucket for bucket in buckets if bucket in existent], workers=workers)
 
-            # Make request
-            self.__service.tables().insert(
+        # Make requests
+        requests = []
+        for _, _, _, body in tables:
+            requests.append(self.__service.tables().insert(
                 projectId=self.__project,
                 datasetId=self.__dataset,
-                body=body).execute()
+                body=body))
+        attributes = {'tables': len(requests)}
+        with self.__tracer.start_as_current_span('storage.create', attributes=attributes):
+            results = self.__execute_requests(requests, workers=workers)
 
-            # Add to descriptors/fallbacks
+        # Add to descriptors/fallbacks
+        errors = []
+        for (bucket, descriptor, fallbacks, body), (_, error) in zip(tables, results):
+            if error is not None:
+                errors.append(error)
+                continue
             self.__descriptors[bucket] = descriptor
             self.__fallbacks[bucket] = fallbacks
+            self.__cache.invalidate(self.__get_cache_key(body['tableReference']['tableId']))
 
         # Remove buckets cache
-        self.__buckets = None
+        self.__cache.invalidate(self.__get_cache_key())
 
-    def delete(self, bucket=None, ignore=False):
+        # Raise errors
+        if errors:
+            raise errors[0]
+
+    def delete(self, bucket=None, ignore=False, workers=1):
+        """Delete buckets
+
+        # Arguments
+            bucket (str/str[]): bucket name or list of bucket names (all by default)
+            ignore (bool): don't raise an error for non-existent buckets
+            workers (int): number of threads to delete tables if batching is disabled
+
+        # Raises
+            tableschema.exceptions.StorageError: if a bucket doesn't exist
+
+        """
 
         # Make lists
+        existent = self.buckets
         buckets = bucket
         if isinstance(bucket, six.string_types):
             buckets = [bucket]
         elif bucket is None:
-            buckets = reversed(self.buckets)
+            buckets = list(reversed(existent))
 
-        # Iterater over buckets
+        # Non-existent buckets
+        existent = set(existent)
         for bucket in buckets:
+            if bucket not in existent and not ignore:
+                message = 'Bucket "%s" doesn\'t exist.' % bucket
+                raise tableschema.exceptions.StorageError(message)
+        buckets = [bucket for bucket in buckets if bucket in existent]
 
-            # Non-existent bucket
-            if bucket not in self.buckets:
-                if not ignore:
-                    message = 'Bucket "%s" doesn\'t exist.' % bucket
-                    raise tableschema.exceptions.StorageError(message)
-                return
-
-            # Remove from descriptors
-            if bucket in self.__descriptors:
-                del self.__descriptors[bucket]
-
-            # Make delete request
+        # Make requests
+        requests = []
+        for bucket in buckets:
             table_name = self.__mapper.convert_bucket(bucket)
-            self.__service.tables().delete(
+            requests.append(self.__service.tables().delete(
                 projectId=self.__project,
                 datasetId=self.__dataset,
-                tableId=table_name).execute()
+                tableId=table_name))
+        attributes = {'tables': len(requests)}
+        with self.__tracer.start_as_current_span('storage.delete', attributes=attributes):
+            results = self.__execute_requests(requests, workers=workers)
+
+        # Remove from descriptors
+        errors = []
+        for bucket, (_, error) in zip(buckets, results):
+            if error is not None:
+                errors.append(error)
+                continue
+            self.__descriptors.pop(bucket, None)
+            table_name = self.__mapper.convert_bucket(bucket)
+            self.__cache.invalidate(self.__get_cache_key(table_name))
 
         # Remove tables cache
-        self.__buckets = None
+        self.__cache.invalidate(self.__get_cache_key())
+
+        # Raise errors
+        if errors:
+            raise errors[0]
 
     def describe(self, bucket, descriptor=None):
+        """Get or set bucket descriptor
+
+        Schemas of many buckets are fetched with batched requests.
+
+        # Arguments
+            bucket (str/str[]): bucket name or list of bucket names
+            descriptor (dict): descriptor to set
+
+        # Returns
+            dict/dict[]: descriptor or list of descriptors
+
+        """
 
         # Set descriptor
         if descriptor is not None:
             self.__descriptors[bucket] = descriptor
+            return descriptor
 
-        # Get descriptor
-        else:
-            descriptor = self.__descriptors.get(bucket)
-            if descriptor is None:
-                table_name = self.__mapper.convert_bucket(bucket)
-                response = self.__service.tables().get(
-                    projectId=self.__project,
-                    datasetId=self.__dataset,
-                    tableId=table_name).execute()
-                converted_descriptor = response['schema']
-                descriptor = self.__mapper.restore_descriptor(converted_descriptor)
+        # Make lists
+        buckets = bucket
+        single = isinstance(bucket, six.string_types)
+        if single:
+            buckets = [bucket]
 
-        return descriptor
+        # Get set descriptors
+        descriptors = {}
+        for bucket in buckets:
+            if bucket in self.__descriptors:
+                descriptors[bucket] = self.__descriptors[bucket]
 
-    def iter(self, bucket):
+        # Restore descriptors
+        missing = [bucket for bucket in buckets if bucket not in descriptors]
+        for bucket, converted_descriptor in self.__get_converted_descriptors(missing).items():
+            descriptors[bucket] = self.__mapper.restore_descriptor(converted_descriptor)
 
-        # Get schema/data
-        schema = tableschema.Schema(self.describe(bucket))
-        table_name = self.__mapper.convert_bucket(bucket)
-        response = self.__service.tabledata().list(
-            projectId=self.__project,
-            datasetId=self.__dataset,
-            tableId=table_name).execute()
+        if single:
+            return descriptors[buckets[0]]
+        return [descriptors[bucket] for bucket in buckets]
 
-        # Collect rows
-        rows = []
-        for fields in response['rows']:
-            row = [field['v'] for field in fields['f']]
-            rows.append(row)
+    def iter(self, bucket, page_size=None, start_index=None, workers=None, preserve_order=True,
+             sort=None, sort_buffer=100000, validate=True):
+        """Iterate over bucket rows
+
+        Rows are fetched page by page following `pageToken` so
+        memory usage is bounded by the page size. If `workers` is provided
+        the table is split into `startIndex` ranges fetched concurrently
+        (rows in the streaming buffer not covered by its estimated size
+        are fetched after the ranges).
+
+        Rows are emitted in storage order unless `sort` is provided. Rows are
+        ordered by the descriptor's `primaryKey` (or the first field) either
+        with an `ORDER BY` query job (`query`) or with an external merge sort
+        spilling sorted runs of `sort_buffer` rows to disk (`merge`).
+
+        # Arguments
+            bucket (str): bucket name
+            page_size (int): rows per page (`maxResults`)
+            start_index (int): zero-based index of the first row to read
+            workers (int): number of threads to fetch pages in parallel
+            preserve_order (bool):
+                for parallel reads emit pages in table order
+                instead of as soon as they arrive
+            sort (str):
+                `query` or `merge` to emit sorted rows;
+                `start_index` and `workers` are ignored for `query`
+            sort_buffer (int): max rows held in memory by `merge` sort
+            validate (bool):
+                cast restored rows with the schema (it could be disabled
+                to skip the revalidation of already typed values)
+
+        # Raises
+            tableschema.exceptions.StorageError: if `sort` is not supported
+
+        # Returns
+            iterator: restored rows
+
+        """
+
+        # Check sort
+        if sort not in [None, 'query', 'merge']:
+            message = 'Sort "%s" is not supported' % sort
+            raise tableschema.exceptions.StorageError(message)
+
+        # Get schema
+        descriptor = self.describe(bucket)
+        schema = tableschema.Schema(descriptor)
+
+        # Get pages
+        if sort == 'query':
+            sql = self.__build_query(bucket, order_by=_get_sort_keys(schema))
+            pages = self.__iter_query_pages(sql, page_size=page_size)
+        elif workers:
+            pages = self.__iter_pages_parallel(
+                bucket, page_size=page_size, start_index=start_index,
+                workers=workers, preserve_order=preserve_order)
+        else:
+            pages = self.__iter_pages(bucket, page_size=page_size, start_index=start_index)
+
+        # Restore rows
+        rows = (row for page in pages
+                for row in self.__restore_rows(page, schema=schema, validate=validate))
 
         # Sort rows
-        # TODO: provide proper sorting solution
-        rows = sorted(rows, key=lambda row: row[0] if row[0] is not None else 'null')
+        if sort == 'merge':
+            indexes = [schema.field_names.index(name) for name in _get_sort_keys(schema)]
+            rows = _merge_sort(rows, key=lambda row: tuple(
+                (row[index] is not None, row[index]) for index in indexes),
+                buffer_size=sort_buffer)
 
         # Emit rows
         for row in rows:
-            row = self.__mapper.restore_row(row, schema=schema)
             yield row
 
-    def read(self, bucket):
-        rows = list(self.iter(bucket))
+    def read(self, bucket, **options):
+        attributes = {'bucket': bucket}
+        with self.__tracer.start_as_current_span('storage.read', attributes=attributes) as span:
+            rows = list(self.iter(bucket, **options))
+            span.set_attribute('rows', len(rows))
         return rows
 
-    def write(self, bucket, rows):
+    def read_dataframe(self, bucket, page_size=None, start_index=None, workers=None,
+                       preserve_order=True):
+        """Read bucket rows to a pandas DataFrame (requires `pandas`)
+
+        Pages are converted column by column with vectorized pandas
+        conversions instead of restoring every value as a Python object.
+        Integers are restored to `Int64`, numbers to `float64`, booleans
+        to `boolean`, dates and datetimes to `datetime64` and times to
+        `timedelta64` columns. Other values stay strings.
+
+        # Arguments
+            bucket (str): bucket name
+            page_size (int): rows per page (`maxResults`)
+            start_index (int): zero-based index of the first row to read
+            workers (int): number of threads to fetch pages in parallel
+            preserve_order (bool): for parallel reads keep pages in table order
+
+        # Raises
+            tableschema.exceptions.StorageError: if pandas is not installed
+
+        # Returns
+            pandas.DataFrame: data frame with a column per field
+
+        """
+        pandas = import_pandas()
+
+        # Get schema
+        descriptor = self.describe(bucket)
+        schema = tableschema.Schema(descriptor)
+
+        # Get pages
+        if workers:
+            pages = self.__iter_pages_parallel(
+                bucket, page_size=page_size, start_index=start_index,
+                workers=workers, preserve_order=preserve_order)
+        else:
+            pages = self.__iter_pages(bucket, page_size=page_size, start_index=start_index)
+
+        # Restore frames
+        attributes = {'bucket': bucket}
+        with self.__tracer.start_as_current_span('storage.read', attributes=attributes) as span:
+            frames = [self.__restore_frame(page, schema) for page in pages]
+            if not frames:
+                frames = [restore_frame([], schema)]
+            frame = pandas.concat(frames, ignore_index=True)
+            span.set_attribute('rows', len(frame))
+
+        return frame
+
+    def query(self, bucket, fields=None, where=None, order_by=None, limit=None, params=None,
+              page_size=None, validate=True):
+        """Query bucket rows
+
+        A query job selects only `fields` of the rows matching `where`
+        so projection and filtering are done by BigQuery. Result pages
+        are restored as they are fetched.
+
+        # Arguments
+            bucket (str): bucket name
+            fields (str[]): names of fields to select (all fields by default)
+            where (str):
+                standard SQL condition using BigQuery column names
+                and `@name` placeholders for `params`
+            order_by (str/str[]):
+                names of fields to order by
+                (a name could be followed only by ` ASC` or ` DESC`)
+            limit (int): max number of rows
+            params (dict):
+                query parameters values by name (timezone aware datetimes
+                are sent as `TIMESTAMP` values and `None` as `NULL` having
+                the type of a column it's compared to in `where` e.g.
+                `id = @id`). A `(type, value)` pair e.g. `('INT64', None)`
+                sets the standard SQL type explicitly
+            page_size (int): rows per page (`maxResults`)
+            validate (bool): cast restored rows with the schema
+
+        # Raises
+            tableschema.exceptions.StorageError:
+                if a field doesn't exist or an order is not supported
+
+        # Returns
+            iterator: restored rows of selected fields
+
+        """
+
+        # Prepare fields
+        descriptor = self.describe(bucket)
+        schema = tableschema.Schema(descriptor)
+        if fields is None:
+            fields = schema.field_names
+        if isinstance(order_by, six.string_types):
+            order_by = [order_by]
+        for name in list(fields) + [_parse_order(item)[0] for item in order_by or []]:
+            if name not in schema.field_names:
+                message = 'Field "%s" doesn\'t exist in bucket "%s"' % (name, bucket)
+                raise tableschema.exceptions.StorageError(message)
+
+        # Prepare params
+        if params:
+            params = self.__type_query_parameters(bucket, where, params)
+
+        # Prepare schema
+        projection = {'fields': [schema.get_field(name).descriptor for name in fields]}
+        if 'missingValues' in descriptor:
+            projection['missingValues'] = descriptor['missingValues']
+        schema = tableschema.Schema(projection)
+
+        # Emit rows
+        sql = self.__build_query(
+            bucket, fields=fields, where=where, order_by=order_by, limit=limit)
+        for page in self.__iter_query_pages(sql, page_size=page_size, params=params):
+            for row in self.__restore_rows(page, schema=schema, validate=validate):
+                yield row
+
+    def write(self, bucket, rows, max_jobs=1, chunk_rows=None, chunk_bytes=None,
+              format='csv', method='load', mode='append', cast=True, validate_every=None,
+              processes=None):
+        """Write rows to bucket
+
+        Rows are loaded in chunks by load jobs (`load` method) or by
+        streaming inserts (`stream` method) for low-latency small writes.
+        A chunk is closed when its encoded size reaches `chunk_bytes`
+        or it holds `chunk_rows` rows. The next chunk is encoded while
+        up to `max_jobs` earlier chunks are being sent. Load jobs are awaited
+        together by one job waiter and all the errors are reported together.
+
+        Rows are appended to the table by default (`append` mode). In `truncate`
+        and `upsert` modes rows are loaded into a staging table first. Then
+        the table contents are replaced atomically by one copy job
+        (`WRITE_TRUNCATE`) or rows are merged into the table by the descriptor's
+        `primaryKey` with one `MERGE` statement so a failed write leaves
+        the table unchanged.
 
-        # Write buffer
-        BUFFER_SIZE = 10000
+        Rows from a typed source (e.g. a database cursor) could be written
+        with `cast` disabled. Then values are only serialized to the wire
+        format and just sampled rows are validated against the schema.
+
+        With `processes` chunks of `chunk_rows` rows are converted and encoded
+        by a pool of worker processes so encoding scales with CPU cores while
+        this process only uploads encoded chunks (rows and the encoder
+        must be picklable and `chunk_bytes` is ignored).
+
+        # Arguments
+            bucket (str): bucket name
+            rows (iterable): rows to write
+            max_jobs (int):
+                max number of chunks being uploaded or loaded by jobs
+                (or insert requests) in flight
+            chunk_rows (int):
+                max number of rows per load job or insert request
+                (500 rows for streaming inserts by default)
+            chunk_bytes (int):
+                max encoded size of a load job or insert request in bytes
+                (256 MB for load jobs and 5 MB for streaming inserts by default)
+            format (str/Encoder):
+                load job format - `csv`, `json` (newline-delimited JSON),
+                `avro` (requires `fastavro`) or an `Encoder` subclass
+            method (str):
+                `load` to use load jobs or `stream` to use
+                `tabledata.insertAll` with `insertId` deduplication
+            mode (str):
+                `append`, `truncate` or `upsert`
+                (only `append` is supported for streaming inserts)
+            cast (bool):
+                cast rows with the schema (if disabled rows are trusted
+                to hold values of the field types e.g. `int` or `datetime.date`)
+            validate_every (int):
+                cast the first and then every N-th row if casting is disabled
+            processes (int):
+                number of worker processes to encode chunks for load jobs
+                (chunks hold 100000 rows by default)
+
+        # Raises
+            tableschema.exceptions.StorageError:
+                if the format, method or mode is not supported,
+                any of the load jobs fails or any of the rows is not inserted
+
+        """
+
+        # Check method
+        if method not in ['load', 'stream']:
+            message = 'Method "%s" is not supported' % method
+            raise tableschema.exceptions.StorageError(message)
+
+        # Check mode
+        if mode not in ['append', 'truncate', 'upsert']:
+            message = 'Mode "%s" is not supported' % mode
+            raise tableschema.exceptions.StorageError(message)
+        if method == 'stream' and mode != 'append':
+            message = 'Mode "%s" is not supported for streaming inserts' % mode
+            raise tableschema.exceptions.StorageError(message)
+        if method == 'stream' and processes:
+            message = 'Encoding processes are not supported for streaming inserts'
+            raise tableschema.exceptions.StorageError(message)
+
+        # Get encoder
+        encoder = format
+        if not (isinstance(format, type) and issubclass(format, Encoder)):
+            encoder = ENCODERS.get(format)
+            if encoder is None:
+                message = 'Format "%s" is not supported' % format
+                raise tableschema.exceptions.StorageError(message)
 
         # Prepare schema, fallbacks
-        schema = tableschema.Schema(self.describe(bucket))
+        descriptor = self.describe(bucket)
+        schema = tableschema.Schema(descriptor)
         fallbacks = self.__fallbacks.get(bucket, [])
+        converted_descriptor, _ = self.__mapper.convert_descriptor(descriptor)
+        if mode == 'upsert' and not schema.primary_key:
+            message = 'Upsert to bucket "%s" requires a primary key' % bucket
+            raise tableschema.exceptions.StorageError(message)
 
-        # Write data
-        rows_buffer = []
-        for row in rows:
-            row = self.__mapper.convert_row(row, schema=schema, fallbacks=fallbacks)
-            rows_buffer.append(row)
-            if len(rows_buffer) > BUFFER_SIZE:
-                self.__write_rows_buffer(bucket, rows_buffer)
-                rows_buffer = []
-        if len(rows_buffer) > 0:
-            self.__write_rows_buffer(bucket, rows_buffer)
+        # Prepare chunks
+        convert = self.__mapper.compile_row_converter(
+            schema, fallbacks, cast=cast, validate_every=validate_every)
+        if method == 'stream':
+            chunks = self.__iter_records(
+                rows, convert=convert,
+                converted_descriptor=converted_descriptor,
+                chunk_rows=chunk_rows or 500, chunk_bytes=chunk_bytes or 5 * 1024 * 1024)
+            send = self.__insert_chunk
+        elif processes:
+            chunks = self.__iter_chunks_parallel(
+                rows, processes=processes,
+                encode=partial(
+                    _encode_chunk, descriptor=descriptor, fallbacks=fallbacks,
+                    encoder=encoder, converted_descriptor=converted_descriptor,
+                    cast=cast, validate_every=validate_every),
+                chunk_rows=chunk_rows or 100000)
+            send = partial(self.__load_chunk, encoder=encoder)
+        else:
+            chunks = self.__iter_chunks(
+                rows, convert=convert,
+                encoder=encoder, converted_descriptor=converted_descriptor,
+                chunk_rows=chunk_rows, chunk_bytes=chunk_bytes or 256 * 1024 * 1024)
+            send = partial(self.__load_chunk, encoder=encoder)
 
-    # Private
+        # Write chunks
+        attributes = {
+            'bucket': bucket, 'method': method, 'mode': mode,
+            'format': encoder.source_format}
+        self.__write_table(
+            bucket, chunks, send=send, max_jobs=max_jobs, mode=mode,
+            converted_descriptor=converted_descriptor, primary_key=schema.primary_key,
+            attributes=attributes)
+
+    def write_dataframe(self, bucket, dataframe, max_jobs=1, chunk_rows=1000000,
+                        mode='append'):
+        """Write pandas DataFrame to bucket (requires `pandas`)
+
+        Slices of `chunk_rows` rows are encoded to CSV column by column
+        with vectorized pandas conversions and sent by load jobs the same
+        way as `write` does. The data frame must have a column for every field
+        (other columns are ignored). Integer columns could have missing values
+        as floats, `datetime64` columns could be timezone aware (they are
+        converted to UTC) and object or array values could be dicts and lists.
+
+        # Arguments
+            bucket (str): bucket name
+            dataframe (pandas.DataFrame): data frame to write
+            max_jobs (int): max number of uploads in flight
+            chunk_rows (int): max number of rows per load job
+            mode (str): `append`, `truncate` or `upsert`
+
+        # Raises
+            tableschema.exceptions.StorageError:
+                if pandas is not installed, a column is missing,
+                the mode is not supported or any of the load jobs fails
+
+        """
+        import_pandas()
+
+        # Check mode
+        if mode not in ['append', 'truncate', 'upsert']:
+            message = 'Mode "%s" is not supported' % mode
+            raise tableschema.exceptions.StorageError(message)
+
+        # Prepare schema
+        descriptor = self.describe(bucket)
+        schema = tableschema.Schema(descriptor)
+        converted_descriptor, _ = self.__mapper.convert_descriptor(descriptor)
+        if mode == 'upsert' and not schema.primary_key:
+            message = 'Upsert to bucket "%s" requires a primary key' % bucket
+            raise tableschema.exceptions.StorageError(message)
+        for name in schema.field_names:
+            if name not in dataframe.columns:
+                message = 'DataFrame doesn\'t have column "%s"' % name
+                raise tableschema.exceptions.StorageError(message)
+
+        # Write chunks
+        chunks = self.__iter_frame_chunks(
+            dataframe, schema, chunk_rows=chunk_rows)
+        attributes = {
+            'bucket': bucket, 'method': 'load', 'mode': mode,
+            'format': CsvEncoder.source_format}
+        self.__write_table(
+            bucket, chunks, send=partial(self.__load_chunk, encoder=CsvEncoder),
+            max_jobs=max_jobs, mode=mode, converted_descriptor=converted_descriptor,
+            primary_key=schema.primary_key, attributes=attributes)
 
-    def __write_rows_buffer(self, bucket, rows_buffer):
+    def export(self, bucket, destination, format='csv', sink=None, validate=True):
+        """Export bucket to object storage
 
-        # Process data to byte stream csv
-        bytes = io.BufferedRandom(io.BytesIO())
-        writer = unicodecsv.writer(bytes, encoding='utf-8')
-        for row in rows_buffer:
-            writer.writerow(row)
-        bytes.seek(0)
+        An extract job writes the table to sharded files. If a `sink` is
+        provided the shards are read back one by one and their rows are
+        decoded with the bucket descriptor.
+
+        # Arguments
+            bucket (str): bucket name
+            destination (str):
+                destination URI e.g. `gs://bucket/path/data-*.csv`
+                (a `*` wildcard is required to export more than 1 GB)
+            format (str):
+                export format - `csv`, `json` (newline-delimited JSON)
+                or `avro` (decoding requires `fastavro`)
+            sink (Sink): object storage sink to read shards from
+            validate (bool): cast restored rows with the schema
+
+        # Raises
+            tableschema.exceptions.StorageError:
+                if the format is not supported or the extract job fails
+
+        # Returns
+            iterator/None: restored rows if `sink` is provided
+
+        """
+
+        # Check format
+        if format not in _EXPORT_FORMATS:
+            message = 'Format "%s" is not supported' % format
+            raise tableschema.exceptions.StorageError(message)
 
         # Prepare job body
         table_name = self.__mapper.convert_bucket(bucket)
+        extract = {
+            'sourceTable': {
+                'projectId': self.__project,
+                'datasetId': self.__dataset,
+                'tableId': table_name,
+            },
+            'destinationUris': [destination],
+            'destinationFormat': _EXPORT_FORMATS[format],
+        }
+        if format == 'csv':
+            extract['printHeader'] = False
+        if format == 'avro':
+            extract['useAvroLogicalTypes'] = True
         body = {
             'configuration': {
-                'load': {
+                'extract': extract,
+            }
+        }
+
+        # Make request to Big Query
+        attributes = {'bucket': bucket, 'format': format}
+        with self.__tracer.start_as_current_span('storage.export', attributes=attributes) as span:
+            response = self.__insert_job(body)
+            span.set_attribute('job_id', response['jobReference']['jobId'])
+            self.__waiter.wait(response)
+
+        # Read shards
+        if sink is not None:
+            return self.__iter_export(bucket, destination, format, sink=sink, validate=validate)
+
+        return None
+
+    # Private
+
+    def __execute_requests(self, requests, workers=1):
+        return execute_requests(
+            self.__service, requests, batch_size=self.__batch_size,
+            workers=workers, num_retries=self.__num_retries, http_pool=self.__http_pool)
+
+    def __get_http(self):
+        if self.__http_pool is None:
+            return None
+        return self.__http_pool.get()
+
+    def __insert_job(self, body):
+
+        # Job id prevents a retried request from starting the job twice
+        job_id = uuid.uuid4().hex
+        body = dict(body, jobReference={'projectId': self.__project, 'jobId': job_id})
+        try:
+            return self.__service.jobs().insert(
+                projectId=self.__project,
+                body=body).execute(http=self.__get_http(), num_retries=self.__num_retries)
+        except HttpError as error:
+            if int(error.resp.status) != 409:
+                raise
+            return self.__service.jobs().get(
+                projectId=self.__project,
+                jobId=job_id).execute(http=self.__get_http(), num_retries=self.__num_retries)
+
+    def __get_cache_key(self, table_name=None):
+        key = '%s.%s' % (self.__project, self.__dataset)
+        if table_name is not None:
+            key = '%s.%s' % (key, table_name)
+        return key
+
+    def __get_converted_descriptors(self, buckets):
+
+        # Get cached schemas
+        converted_descriptors = {}
+        for bucket in buckets:
+            table_name = self.__mapper.convert_bucket(bucket)
+            converted_descriptor = self.__cache.get(self.__get_cache_key(table_name))
+            if converted_descriptor is not None:
+                converted_descriptors[bucket] = converted_descriptor
+
+        # Get missing schemas
+        missing = [bucket for bucket in buckets if bucket not in converted_descriptors]
+        requests = []
+        for bucket in missing:
+            requests.append(self.__service.tables().get(
+                projectId=self.__project,
+                datasetId=self.__dataset,
+                tableId=self.__mapper.convert_bucket(bucket)))
+        attributes = {'tables': len(requests)}
+        with self.__tracer.start_as_current_span('storage.describe', attributes=attributes):
+            results = self.__execute_requests(requests)
+        items = {}
+        for bucket, (response, error) in zip(missing, results):
+            if error is not None:
+                raise error
+            table_name = self.__mapper.convert_bucket(bucket)
+            converted_descriptors[bucket] = response['schema']
+            items[self.__get_cache_key(table_name)] = response['schema']
+        if items:
+            self.__cache.set_many(items)
+
+        return converted_descriptors
+
+    def __write_table(self, bucket, chunks, send, max_jobs, mode,
+                      converted_descriptor, primary_key, attributes):
+
+        # Write chunks (to a staging table for truncate and upsert)
+        table_name = self.__mapper.convert_bucket(bucket)
+        with self.__tracer.start_as_current_span('storage.write', attributes=attributes) as span:
+            if mode == 'append':
+                errors = self.__write_chunks(
+                    table_name, chunks, send=send, max_jobs=max_jobs, span=span)
+            else:
+                staging_name = self.__create_staging_table(
+                    table_name, converted_descriptor, like_table=mode == 'truncate')
+                try:
+                    errors = self.__write_chunks(
+                        staging_name, chunks, send=send, max_jobs=max_jobs, span=span)
+                    if not errors and mode == 'truncate':
+                        self.__copy_table(staging_name, table_name)
+                    elif not errors:
+                        self.__merge_table(
+                            table_name, staging_name, converted_descriptor,
+                            primary_key=primary_key)
+                finally:
+                    self.__delete_staging_table(staging_name)
+
+        # Raise errors
+        if errors:
+            message = '\n'.join(errors)
+            raise tableschema.exceptions.StorageError(message)
+
+    def __write_chunks(self, table_name, chunks, send, max_jobs, span):
+        jobs = []
+        errors = []
+        count = 0
+        total = 0
+
+        # Send chunks keeping a bounded number of them uploading or loading
+        with ThreadPoolExecutor(max_workers=max_jobs) as executor:
+            futures = set()
+            for chunk in chunks:
+                while len(futures) + len(jobs) >= max_jobs and not errors:
+                    if futures:
+                        done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                        total += _collect_jobs(done, jobs, errors)
+                    else:
+                        done, jobs = self.__waiter.wait_some(jobs, max_pending=max_jobs - 1)
+                        errors.extend(get_job_errors(done))
+                if errors:
+                    break
+                futures.add(executor.submit(send, table_name, chunk))
+                count += 1
+            total += _collect_jobs(futures, jobs, errors)
+        span.set_attribute('chunks', count)
+        span.set_attribute('jobs', total)
+
+        # Wait jobs
+        try:
+            self.__waiter.wait_all(jobs)
+        except tableschema.exceptions.StorageError as exception:
+            errors.append(str(exception))
+
+        return errors
+
+    def __create_staging_table(self, table_name, converted_descriptor, like_table=False):
+
+        # Staging tables expire in a day if they are not deleted
+        staging_name = self.__mapper.convert_staging_table(table_name, uuid.uuid4().hex)
+        expiration = int((time.time() + 24 * 60 * 60) * 1000)
+        body = {
+            'tableReference': {
+                'projectId': self.__project,
+                'datasetId': self.__dataset,
+                'tableId': staging_name,
+            },
+            'schema': converted_descriptor,
+            'expirationTime': str(expiration),
+        }
+
+        # Copy jobs replace the schema and require the same partitioning and clustering
+        if like_table:
+            table = self.__service.tables().get(
+                projectId=self.__project,
+                datasetId=self.__dataset,
+                tableId=table_name).execute(
+                    http=self.__get_http(), num_retries=self.__num_retries)
+            for key in ['schema', 'timePartitioning', 'rangePartitioning', 'clustering']:
+                if key in table:
+                    body[key] = table[key]
+
+        self.__service.tables().insert(
+            projectId=self.__project,
+            datasetId=self.__dataset,
+            body=body).execute(http=self.__get_http())
+
+        return staging_name
+
+    def __delete_staging_table(self, staging_name):
+
+        # Failed deletion doesn't hide the original error (the table expires anyway)
+        try:
+            self.__service.tables().delete(
+                projectId=self.__project,
+                datasetId=self.__dataset,
+                tableId=staging_name).execute(http=self.__get_http())
+        except Exception:
+            pass
+
+    def __copy_table(self, staging_name, table_name):
+
+        # Prepare job body
+        body = {
+            'configuration': {
+                'copy': {
+                    'sourceTable': {
+                        'projectId': self.__project,
+                        'datasetId': self.__dataset,
+                        'tableId': staging_name,
+                    },
                     'destinationTable': {
                         'projectId': self.__project,
                         'datasetId': self.__dataset,
-                        'tableId': table_name
+                        'tableId': table_name,
                     },
-                    'sourceFormat': 'CSV',
+                    'writeDisposition': 'WRITE_TRUNCATE',
                 }
             }
         }
 
+        # Make request to Big Query (table contents are replaced atomically)
+        response = self.__insert_job(body)
+
+        return self.__waiter.wait(response)
+
+    def __merge_table(self, table_name, staging_name, converted_descriptor, primary_key):
+
+        # Prepare columns
+        keys = [self.__mapper.convert_field_name(name) for name in primary_key]
+        names = [field['name'] for field in converted_descriptor['fields']]
+        values = [name for name in names if name not in keys]
+
+        # Build statement
+        sql = 'MERGE `%s.%s.%s` T USING `%s.%s.%s` S ON %s' % (
+            self.__project, self.__dataset, table_name,
+            self.__project, self.__dataset, staging_name,
+            ' AND '.join('T.`%s` = S.`%s`' % (name, name) for name in keys))
+        if values:
+            sql += ' WHEN MATCHED THEN UPDATE SET %s' % ', '.join(
+                '`%s` = S.`%s`' % (name, name) for name in values)
+        sql += ' WHEN NOT MATCHED THEN INSERT (%s) VALUES (%s)' % (
+            ', '.join('`%s`' % name for name in names),
+            ', '.join('S.`%s`' % name for name in names))
+
+        return self.__run_query(sql)
+
+    def __restore_rows(self, rows, schema, validate=True):
+        attributes = {'rows': len(rows)}
+        with self.__tracer.start_as_current_span('storage.restore', attributes=attributes):
+            return self.__mapper.restore_rows(rows, schema, validate=validate)
+
+    def __restore_frame(self, rows, schema):
+        attributes = {'rows': len(rows)}
+        with self.__tracer.start_as_current_span('storage.restore', attributes=attributes):
+            return restore_frame(rows, schema)
+
+    def __iter_frame_chunks(self, dataframe, schema, chunk_rows):
+
+        # Encode data frame slices to chunks spilling to disk
+        for start in range(0, len(dataframe), chunk_rows):
+            with self.__tracer.start_as_current_span('storage.encode') as span:
+                frame = dataframe.iloc[start:start + chunk_rows]
+                bytes = tempfile.SpooledTemporaryFile(max_size=self.__spool_size)
+                encode_frame(frame, schema, bytes)
+                span.set_attribute('rows', len(frame))
+                span.set_attribute('bytes', bytes.tell())
+            bytes.seek(0)
+            yield bytes
+
+    def __iter_export(self, bucket, destination, format, sink, validate=True):
+
+        # Prepare schema
+        descriptor = self.describe(bucket)
+        schema = tableschema.Schema(descriptor)
+        converted_descriptor, _ = self.__mapper.convert_descriptor(descriptor)
+        names = [field['name'] for field in converted_descriptor['fields']]
+
+        # Emit rows shard by shard
+        PAGE_SIZE = 10000
+        for uri in sink.list(destination):
+            stream = sink.open(uri)
+            try:
+                page = []
+                for row in _decode_shard(stream, format, names=names):
+                    page.append(row)
+                    if len(page) >= PAGE_SIZE:
+                        for row in self.__restore_rows(page, schema, validate=validate):
+                            yield row
+                        page = []
+                for row in self.__restore_rows(page, schema, validate=validate):
+                    yield row
+            finally:
+                stream.close()
+
+    def __iter_chunks(self, rows, convert, encoder, converted_descriptor,
+                      chunk_rows=None, chunk_bytes=None):
+
+        # Encode data to chunks spilling to disk
+        rows = iter(rows)
+        while True:
+            with self.__tracer.start_as_current_span('storage.encode') as span:
+                count = 0
+                bytes = tempfile.SpooledTemporaryFile(max_size=self.__spool_size)
+                writer = encoder(bytes, converted_descriptor)
+                for row in rows:
+                    writer.write(convert(row))
+                    count += 1
+                    rows_exceeded = chunk_rows and count >= chunk_rows
+                    bytes_exceeded = chunk_bytes and bytes.tell() >= chunk_bytes
+                    if rows_exceeded or bytes_exceeded:
+                        break
+                writer.close()
+                span.set_attribute('rows', count)
+                span.set_attribute('bytes', bytes.tell())
+            if count == 0:
+                bytes.close()
+                break
+            bytes.seek(0)
+            yield bytes
+
+    def __iter_chunks_parallel(self, rows, processes, encode, chunk_rows):
+
+        # Encode chunks in worker processes keeping a bounded number of them in flight
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = []
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= chunk_rows:
+                    futures.append(executor.submit(encode, batch))
+                    batch = []
+                if len(futures) >= processes * 2:
+                    yield self.__get_encoded_chunk(futures.pop(0))
+            if batch:
+                futures.append(executor.submit(encode, batch))
+            for future in futures:
+                yield self.__get_encoded_chunk(future)
+
+    def __get_encoded_chunk(self, future):
+        with self.__tracer.start_as_current_span('storage.encode') as span:
+            count, data = future.result()
+            bytes = tempfile.SpooledTemporaryFile(max_size=self.__spool_size)
+            bytes.write(data)
+            bytes.seek(0)
+            span.set_attribute('rows', count)
+            span.set_attribute('bytes', len(data))
+        return bytes
+
+    def __load_chunk(self, table_name, bytes, encoder):
+
+        # Prepare job body
+        load = {
+            'destinationTable': {
+                'projectId': self.__project,
+                'datasetId': self.__dataset,
+                'tableId': table_name
+            },
+            'sourceFormat': encoder.source_format,
+            'writeDisposition': 'WRITE_APPEND',
+        }
+        load.update(encoder.options)
+        body = {
+            'configuration': {
+                'load': load,
+            }
+        }
+
         # Prepare job media body
         mimetype = 'application/octet-stream'
-        media_body = MediaIoBaseUpload(bytes, mimetype=mimetype)
+        media_body = MediaIoBaseUpload(
+            bytes, mimetype=mimetype, chunksize=self.__upload_chunk_size, resumable=True)
 
-        # Make request to Big Query
-        response = self.__service.jobs().insert(
+        # Make request to Big Query (failed upload requests are retried)
+        attributes = {'bytes': media_body.size(), 'requests': 0}
+        with self.__tracer.start_as_current_span('storage.upload', attributes=attributes) as span:
+            try:
+                request = self.__service.jobs().insert(
+                    projectId=self.__project,
+                    body=body,
+                    media_body=media_body)
+                response = None
+                requests = 0
+                while response is None:
+                    _, response = request.next_chunk(
+                        http=self.__get_http(), num_retries=self.__num_retries)
+                    requests += 1
+                    span.set_attribute('requests', requests)
+                span.set_attribute('job_id', response['jobReference']['jobId'])
+            finally:
+                bytes.close()
+
+        return response
+
+    def __iter_records(self, rows, convert, converted_descriptor,
+                       chunk_rows=None, chunk_bytes=None):
+
+        # Convert data to insertAll records chunks
+        offset = 0
+        rows = iter(rows)
+        encoder = JsonEncoder(None, converted_descriptor)
+        while True:
+            with self.__tracer.start_as_current_span('storage.encode') as span:
+                size = 0
+                records = []
+                for row in rows:
+                    record = encoder.convert(convert(row))
+                    records.append({'insertId': uuid.uuid4().hex, 'json': record})
+                    size += len(encoder.dumps(record))
+                    if len(records) >= chunk_rows or size >= chunk_bytes:
+                        break
+                span.set_attribute('rows', len(records))
+                span.set_attribute('bytes', size)
+            if not records:
+                break
+            yield (offset, records)
+            offset += len(records)
+
+    def __insert_chunk(self, table_name, chunk):
+
+        # Make request to Big Query (retried requests are deduplicated by insertId)
+        offset, records = chunk
+        attributes = {'rows': len(records)}
+        with self.__tracer.start_as_current_span('storage.insert', attributes=attributes) as span:
+            response = self.__service.tabledata().insertAll(
+                projectId=self.__project,
+                datasetId=self.__dataset,
+                tableId=table_name,
+                body={'rows': records}).execute(
+                    http=self.__get_http(), num_retries=self.__num_retries)
+            span.set_attribute('failed_rows', len(response.get('insertErrors', [])))
+
+        # Raise errors
+        if response.get('insertErrors'):
+            errors = []
+            for item in response['insertErrors']:
+                for error in item.get('errors', []):
+                    index = offset + item['index']
+                    errors.append('Row %s: %s' % (index, error.get('message', error.get('reason'))))
+            message = '\n'.join(errors)
+            raise tableschema.exceptions.StorageError(message)
+
+    def __iter_pages(self, bucket, page_size=None, start_index=None):
+
+        # Prepare request params
+        params = {}
+        if page_size is not None:
+            params['maxResults'] = page_size
+        if start_index is not None:
+            params['startIndex'] = start_index
+
+        # Follow page tokens
+        table_name = self.__mapper.convert_bucket(bucket)
+        while True:
+            with self.__tracer.start_as_current_span('storage.fetch') as span:
+                response = self.__service.tabledata().list(
+                    projectId=self.__project,
+                    datasetId=self.__dataset,
+                    tableId=table_name,
+                    **params).execute(
+                        http=self.__get_http(), num_retries=self.__num_retries)
+                rows = [[field['v'] for field in fields['f']]
+                        for fields in response.get('rows', [])]
+                span.set_attribute('rows', len(rows))
+            if rows:
+                yield rows
+            page_token = response.get('pageToken')
+            if not page_token:
+                break
+            params.pop('startIndex', None)
+            params['pageToken'] = page_token
+
+    def __iter_pages_parallel(self, bucket, page_size=None, start_index=None,
+                              workers=1, preserve_order=True):
+
+        # Shard size
+        SHARD_SIZE = 10000
+
+        # Get rows count
+        table_name = self.__mapper.convert_bucket(bucket)
+        response = self.__service.tables().get(
             projectId=self.__project,
-            body=body,
-            media_body=media_body).execute()
-        self.__wait_response(response)
+            datasetId=self.__dataset,
+            tableId=table_name).execute(
+                http=self.__get_http(), num_retries=self.__num_retries)
+        count = int(response.get('numRows', 0))
+        count += int(response.get('streamingBuffer', {}).get('estimatedRows', 0))
+
+        # Split table into ranges
+        size = page_size or SHARD_SIZE
+        starts = iter(range(start_index or 0, count, size))
+        ranges = ((start, min(size, count - start)) for start in starts)
+        for rows in self.__iter_ranges(table_name, ranges, workers, preserve_order):
+            yield rows
+
+        # Fetch rows not counted by the (estimated) rows count
+        start = max(count, start_index or 0)
+        while True:
+            rows = self.__fetch_range(table_name, start, size)
+            if rows:
+                yield rows
+            if len(rows) < size:
+                break
+            start += len(rows)
+
+    def __iter_ranges(self, table_name, ranges, workers, preserve_order):
+
+        # Fetch ranges keeping a bounded number of them in flight
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for start, length in ranges:
+                futures.append(executor.submit(self.__fetch_range, table_name, start, length))
+                if len(futures) < workers * 2:
+                    continue
+                if preserve_order:
+                    yield futures.pop(0).result()
+                else:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        futures.remove(future)
+                        yield future.result()
+            if not preserve_order:
+                futures = as_completed(futures)
+            for future in futures:
+                yield future.result()
+
+    def __fetch_range(self, table_name, start, length):
+        rows = []
+        with self.__tracer.start_as_current_span('storage.fetch') as span:
+            while len(rows) < length:
+                response = self.__service.tabledata().list(
+                    projectId=self.__project,
+                    datasetId=self.__dataset,
+                    tableId=table_name,
+                    startIndex=start + len(rows),
+                    maxResults=length - len(rows)).execute(
+                        http=self.__get_http(), num_retries=self.__num_retries)
+                page = response.get('rows', [])
+                if not page:
+                    break
+                rows.extend([field['v'] for field in fields['f']] for fields in page)
+            span.set_attribute('rows', len(rows))
+        return rows
 
-    def __wait_response(self, response):
+    def __build_query(self, bucket, fields=None, where=None, order_by=None, limit=None):
 
-        # Get job instance
-        job = self.__service.jobs().get(
-            projectId=response['jobReference']['projectId'],
-            jobId=response['jobReference']['jobId'])
+        # Select
+        columns = '*'
+        if fields is not None:
+            columns = ', '.join(
+                '`%s`' % self.__mapper.convert_field_name(name) for name in fields)
+        table_name = self.__mapper.convert_bucket(bucket)
+        sql = 'SELECT %s FROM `%s.%s.%s`' % (columns, self.__project, self.__dataset, table_name)
+
+        # Where
+        if where:
+            sql += ' WHERE %s' % where
+
+        # Order by
+        if order_by:
+            items = []
+            for item in order_by:
+                name, direction = _parse_order(item)
+                items.append(' '.join(
+                    ['`%s`' % self.__mapper.convert_field_name(name)] + direction))
+            sql += ' ORDER BY %s' % ', '.join(items)
+
+        # Limit
+        if limit is not None:
+            sql += ' LIMIT %d' % limit
+
+        return sql
+
+    def __run_query(self, sql, params=None):
+
+        # Prepare job body
+        body = {
+            'configuration': {
+                'query': {
+                    'query': sql,
+                    'useLegacySql': False,
+                }
+            }
+        }
+        if params:
+            body['configuration']['query']['parameterMode'] = 'NAMED'
+            body['configuration']['query']['queryParameters'] = [
+                _convert_query_parameter(name, value) for name, value in sorted(params.items())]
+
+        # Make request to Big Query
+        with self.__tracer.start_as_current_span('storage.query') as span:
+            response = self.__insert_job(body)
+            span.set_attribute('job_id', response['jobReference']['jobId'])
+            return self.__waiter.wait(response)
+
+    def __type_query_parameters(self, bucket, where, params):
+
+        # Get column types
+        types = {}
+        converted_descriptor = self.__get_converted_descriptors([bucket])[bucket]
+        for field in converted_descriptor['fields']:
+            if field['type'] != 'RECORD' and field.get('mode') != 'REPEATED':
+                types[field['name']] = _STANDARD_TYPES.get(field['type'], field['type'])
+
+        # NULL takes the type of a compared column
+        params = dict(params)
+        for name, column in _find_parameter_comparisons(where):
+            if params.get(name, False) is None and column in types:
+                params[name] = (types[column], None)
 
-        # Wait done
+        return params
+
+    def __iter_query_pages(self, sql, page_size=None, params=None):
+
+        # Run query job
+        reference = self.__run_query(sql, params=params)['jobReference']
+
+        # Prepare request params
+        params = {}
+        if page_size is not None:
+            params['maxResults'] = page_size
+
+        # Follow page tokens
         while True:
-            result = job.execute(num_retries=1)
-            if result['status']['state'] == 'DONE':
-                if result['status'].get('errors'):
-                    errors = result['status']['errors']
-                    message = '\n'.join(error['message'] for error in errors)
-                    raise tableschema.exceptions.StorageError(message)
+            with self.__tracer.start_as_current_span('storage.fetch') as span:
+                response = self.__service.jobs().getQueryResults(
+                    projectId=reference['projectId'],
+                    jobId=reference['jobId'],
+                    **params).execute(
+                        http=self.__get_http(), num_retries=self.__num_retries)
+                rows = [[field['v'] for field in fields['f']]
+                        for fields in response.get('rows', [])]
+                span.set_attribute('rows', len(rows))
+            if rows:
+                yield rows
+            page_token = response.get('pageToken')
+            if not page_token:
                 break
-            time.sleep(1)
+            params['pageToken'] = page_token
+
+
+# Internal
+
+def _get_sort_keys(schema):
+    keys = schema.primary_key
+    if not keys:
+        keys = schema.field_names[:1]
+    return keys
+
+
+_EXPORT_FORMATS = {
+    'csv': 'CSV',
+    'json': 'NEWLINE_DELIMITED_JSON',
+    'avro': 'AVRO',
+}
+
+
+def _decode_shard(stream, format, names):
+
+    # CSV (empty strings are nulls)
+    if format == 'csv':
+        for row in unicodecsv.reader(stream, encoding='utf-8'):
+            yield [value if value != '' else None for value in row]
+
+    # JSON (nulls are omitted)
+    elif format == 'json':
+        for line in stream:
+            if line.strip():
+                record = json.loads(line.decode('utf-8'))
+                yield [_to_wire_value(record.get(name)) for name in names]
+
+    # Avro
+    elif format == 'avro':
+        try:
+            import fastavro
+        except ImportError:
+            message = 'Avro format requires "fastavro" package to be installed'
+            raise tableschema.exceptions.StorageError(message)
+        for record in fastavro.reader(stream):
+            yield [_to_wire_value(record.get(name)) for name in names]
+
+
+def _to_wire_value(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return six.text_type(value)
+
+
+def _parse_order(item):
+
+    # Name could be followed only by a direction
+    parts = item.split()
+    direction = [part.upper() for part in parts[1:]]
+    if not parts or direction not in [[], ['ASC'], ['DESC']]:
+        message = 'Order "%s" is not supported' % item
+        raise tableschema.exceptions.StorageError(message)
+
+    return parts[0], direction
+
+
+def _convert_query_parameter(name, value):
+
+    # Explicit types are passed as (type, value) pairs
+    if isinstance(value, tuple):
+        type, value = value
+    else:
+        type = _get_query_parameter_type(value)
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+
+    # NULL has no value
+    parameter_value = {}
+    if value is not None:
+        parameter_value['value'] = six.text_type(value)
+
+    return {
+        'name': name,
+        'parameterType': {'type': type},
+        'parameterValue': parameter_value,
+    }
+
+
+def _get_query_parameter_type(value):
+
+    # Mapping (bool is checked before int and datetime before date)
+    mapping = [
+        (bool, 'BOOL'),
+        (six.integer_types, 'INT64'),
+        ((float, Decimal), 'FLOAT64'),
+        (datetime.datetime, 'DATETIME'),
+        (datetime.date, 'DATE'),
+        (datetime.time, 'TIME'),
+    ]
+
+    # Convert
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return 'TIMESTAMP'
+    for types, parameter_type in mapping:
+        if isinstance(value, types):
+            return parameter_type
+    return 'STRING'
+
+
+def _find_parameter_comparisons(where):
+    # Pairs of a parameter name and a column name e.g. `id = @id` or `@id = id`
+    comparisons = []
+    for match in _COMPARISON_PATTERN.finditer(where or ''):
+        if match.group('param1'):
+            comparisons.append((match.group('param1'), match.group('column1')))
+        else:
+            comparisons.append((match.group('param2'), match.group('column2')))
+    return comparisons
+
+
+_COMPARISON_PATTERN = re.compile(
+    r'`?(?P<column1>\w+)`?\s*(?:=|!=|<>|<=|>=|<|>)\s*@(?P<param1>\w+)|'
+    r'@(?P<param2>\w+)\s*(?:=|!=|<>|<=|>=|<|>)\s*`?(?P<column2>\w+)`?')
+_STANDARD_TYPES = {'INTEGER': 'INT64', 'FLOAT': 'FLOAT64', 'BOOLEAN': 'BOOL'}
+
+
+def _merge_sort(rows, key, buffer_size):
+
+    # Spill sorted runs
+    runs = []
+    buffer = []
+    try:
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= buffer_size:
+                buffer.sort(key=key)
+                runs.append(_spill_rows(buffer))
+                buffer = []
+        buffer.sort(key=key)
+
+        # Everything fits into memory
+        if not runs:
+            for row in buffer:
+                yield row
+            return
+
+        # Merge runs (run index and position keep ordering stable)
+        runs.append(_spill_rows(buffer))
+        buffer = []
+        iterators = []
+        for number, run in enumerate(runs):
+            iterators.append(
+                ((key(row), number, position, row)
+                 for position, row in enumerate(_load_rows(run))))
+        for item in heapq.merge(*iterators):
+            yield item[-1]
+
+    # Remove runs
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _encode_chunk(rows, descriptor, fallbacks, encoder, converted_descriptor,
+                  cast=True, validate_every=None):
+
+    # Reuse schema and mapper for chunks of the same descriptor
+    key = json.dumps(descriptor, sort_keys=True)
+    if _ENCODING_STATE.get('key') != key:
+        _ENCODING_STATE.update(
+            key=key, schema=tableschema.Schema(descriptor), mapper=Mapper(prefix=''))
+    schema = _ENCODING_STATE['schema']
+    convert = _ENCODING_STATE['mapper'].compile_row_converter(
+        schema, fallbacks, cast=cast, validate_every=validate_every)
+
+    # Encode rows
+    stream = io.BytesIO()
+    writer = encoder(stream, converted_descriptor)
+    for row in rows:
+        writer.write(convert(row))
+    writer.close()
+
+    return len(rows), stream.getvalue()
+
+
+_ENCODING_STATE = {}
+
+
+def _collect_jobs(futures, jobs, errors):
+    # Streaming inserts return no jobs
+    count = 0
+    for future in futures:
+        error = future.exception()
+        if isinstance(error, tableschema.exceptions.StorageError):
+            errors.append(str(error))
+        elif error is not None:
+            raise error
+        elif future.result() is not None:
+            jobs.append(future.result())
+            count += 1
+    return count
+
+
+def _spill_rows(rows):
+    file = tempfile.TemporaryFile()
+    for row in rows:
+        pickle.dump(row, file, pickle.HIGHEST_PROTOCOL)
+    file.seek(0)
+    return file
+
+
+def _load_rows(file):
+    while True:
+        try:
+            yield pickle.load(file)
+        except EOFError:
+            break
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import six
+import time
+import threading
+
+
+# Module API
+
+class Tracer(object):
+    """Tracer doing nothing
+
+    `Storage` wraps operations (`storage.write`, `storage.read` etc) and
+    their phases (`storage.encode`, `storage.upload`, `storage.insert`,
+    `storage.wait`, `storage.fetch`, `storage.restore`) into spans with
+    `start_as_current_span(name, attributes)`. Span attributes hold row
+    and byte counts, job ids, poll counts etc. Any object having this
+    method could be used as a tracer e.g. an OpenTelemetry `Tracer`.
+    Subclasses could override `record` to get finished spans.
+
+    """
+
+    # Public
+
+    def start_as_current_span(self, name, attributes=None):
+        """Start span
+
+        # Arguments
+            name (str): span name
+            attributes (dict): span attributes
+
+        # Returns
+            Span: context manager returning a span with `set_attribute` method
+
+        """
+        return Span(self, name, attributes)
+
+    def record(self, name, seconds, attributes):
+        """Record finished span
+
+        # Arguments
+            name (str): span name
+            seconds (float): span duration in seconds
+            attributes (dict): span attributes
+
+        """
+        pass
+
+
+class MetricsTracer(Tracer):
+    """Tracer aggregating metrics by span name
+
+    # Arguments
+        callback (func):
+            function called with `name`, `seconds` and `attributes`
+            for every finished span
+
+    """
+
+    # Public
+
+    def __init__(self, callback=None):
+        self.__callback = callback
+        self.__metrics = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def metrics(self):
+        """Metrics by span name
+
+        Every item has `count`, `errors`, `seconds` and `max_seconds` keys
+        and sums of all numeric span attributes (e.g. `rows` or `bytes`).
+
+        # Returns
+            dict: metrics
+
+        """
+        with self.__lock:
+            return dict((name, dict(metric)) for name, metric in self.__metrics.items())
+
+    def record(self, name, seconds, attributes):
+        with self.__lock:
+            metric = self.__metrics.setdefault(
+                name, {'count': 0, 'errors': 0, 'seconds': 0, 'max_seconds': 0})
+            metric['count'] += 1
+            metric['seconds'] += seconds
+            metric['max_seconds'] = max(metric['max_seconds'], seconds)
+            if attributes.get('error'):
+                metric['errors'] += 1
+            for key, value in attributes.items():
+                if key in _RESERVED_KEYS or isinstance(value, bool):
+                    continue
+                if isinstance(value, six.integer_types + (float,)):
+                    metric[key] = metric.get(key, 0) + value
+        if self.__callback is not None:
+            self.__callback(name, seconds, attributes)
+
+    def reset(self):
+        """Remove all the metrics
+        """
+        with self.__lock:
+            self.__metrics = {}
+
+
+class Span(object):
+    """Span created by `Tracer.start_as_current_span`
+
+    # Arguments
+        tracer (Tracer): tracer to record the span to
+        name (str): span name
+        attributes (dict): span attributes
+
+    """
+
+    # Public
+
+    def __init__(self, tracer, name, attributes=None):
+        self.__tracer = tracer
+        self.__name = name
+        self.__attributes = dict(attributes or {})
+        self.__start = None
+
+    def __enter__(self):
+        self.__start = time.time()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if value is not None:
+            self.__attributes['error'] = True
+        seconds = time.time() - self.__start
+        self.__tracer.record(self.__name, seconds, self.__attributes)
+
+    def set_attribute(self, key, value):
+        """Set span attribute
+
+        # Arguments
+            key (str): attribute name
+            value (any): attribute value
+
+        """
+        self.__attributes[key] = value
+
+
+# Internal
+
+_RESERVED_KEYS = ['count', 'errors', 'seconds', 'max_seconds']
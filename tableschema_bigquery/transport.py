@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import httplib2
+import threading
+
+
+# Module API
+
+def create_http_pool(service):
+    """Create pool of transports authorized like the transport of a service
+
+    Credentials of a `Service` object built by `googleapiclient` are taken
+    from its transport (authorized by `oauth2client` or `google-auth`).
+
+    # Arguments
+        service (object): BigQuery `Service` object
+
+    # Returns
+        HttpPool/None: pool or `None` if the service doesn't use an `httplib2` transport
+
+    """
+    factory = _get_http_factory(getattr(service, '_http', None))
+    if factory is None:
+        return None
+    return HttpPool(factory)
+
+
+class HttpPool(object):
+    """Pool of HTTP transports to share one `Service` object between threads
+
+    `httplib2.Http` is not thread-safe so every thread gets its own transport
+    created by `factory`. A transport is reused for all the next requests
+    of its thread keeping connections alive. The `Service` object (and so
+    its discovery document) is built only once and shared by all threads.
+
+    # Arguments
+        factory (func):
+            function returning a new authorized `httplib2.Http` e.g.
+            `lambda: credentials.authorize(httplib2.Http())`
+
+    """
+
+    # Public
+
+    def __init__(self, factory):
+        self.__factory = factory
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    def get(self):
+        """Get transport of the current thread
+
+        # Returns
+            object: `httplib2.Http` like object
+
+        """
+        http = getattr(self.__local, 'http', None)
+        if http is None:
+            http = self.__local.http = self.__factory()
+            with self.__lock:
+                self.__size += 1
+        return http
+
+
+# Internal
+
+def _get_http_factory(http):
+
+    # Authorized by oauth2client
+    credentials = getattr(getattr(http, 'request', None), 'credentials', None)
+    if credentials is not None:
+        return lambda: credentials.authorize(httplib2.Http(timeout=http.timeout))
+
+    # Authorized by google-auth
+    credentials = getattr(http, 'credentials', None)
+    if credentials is not None and not isinstance(credentials, httplib2.Credentials):
+        return lambda: type(http)(credentials, http=httplib2.Http(timeout=http.http.timeout))
+
+    # Not authorized
+    if isinstance(http, httplib2.Http):
+        return lambda: httplib2.Http(timeout=http.timeout)
+
+    return None
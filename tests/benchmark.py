@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import sys
+import json
+import time
+import argparse
+import datetime
+import tableschema
+from tableschema_bigquery import Storage
+from tableschema_bigquery.mapper import Mapper
+from .fake import FakeService
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+# Module API
+
+def benchmark(sizes=[10000, 100000], widths=[5, 20], latency=0, processes=4):
+    """Benchmark Storage and Mapper hot paths against the fake service
+
+    # Arguments
+        sizes (int[]): numbers of rows
+        widths (int[]): numbers of columns
+        latency (float): delay in seconds added to every HTTP request
+        processes (int): number of encoding processes for a parallel write
+
+    # Returns
+        dict[]: measurements (one per size and width)
+
+    """
+    results = []
+    for width in widths:
+        for size in sizes:
+            descriptor = _get_descriptor(width)
+            rows = _get_rows(descriptor, size)
+            result = {'rows': size, 'columns': width}
+
+            # Write
+            service = FakeService(latency=latency)
+            storage = Storage(service, project='project', dataset='dataset')
+            storage.create('bucket', descriptor)
+            seconds, result['write_peak_mb'] = _measure(
+                lambda: storage.write('bucket', iter(rows)), memory=True)
+            result['write_rows_per_sec'] = size / seconds
+            seconds, _ = _measure(
+                lambda: storage.write(
+                    'bucket', iter(rows), mode='truncate', cast=False, validate_every=1000))
+            result['trusted_write_rows_per_sec'] = size / seconds
+            seconds, _ = _measure(lambda: storage.write(
+                'bucket', iter(rows), mode='truncate', chunk_rows=max(size // 8, 1000),
+                processes=processes))
+            result['processes_write_rows_per_sec'] = size / seconds
+
+            # Mapper (rows as returned by the API are restored)
+            mapper = Mapper('')
+            schema = tableschema.Schema(descriptor)
+            wire_rows = service.get_rows('project', 'dataset', 'bucket')
+            seconds, _ = _measure(lambda: [mapper.convert_row(row, schema, {}) for row in rows])
+            result['convert_us_per_cell'] = seconds / (size * width) * 1000000
+            seconds, _ = _measure(lambda: mapper.restore_rows(wire_rows, schema))
+            result['restore_us_per_cell'] = seconds / (size * width) * 1000000
+
+            # Iterate
+            seconds, result['iter_peak_mb'] = _measure(
+                lambda: _consume(storage.iter('bucket')), memory=True)
+            result['iter_rows_per_sec'] = size / seconds
+
+            results.append(result)
+    return results
+
+
+# Internal
+
+def _get_descriptor(width):
+    types = ['integer', 'number', 'string', 'boolean', 'date', 'datetime']
+    fields = []
+    for index in range(width):
+        fields.append({'name': 'field%d' % index, 'type': types[index % len(types)]})
+    return {'fields': fields}
+
+
+def _get_rows(descriptor, size):
+    values = {
+        'integer': lambda number: number,
+        'number': lambda number: number / 4,
+        'string': lambda number: 'value%d' % number,
+        'boolean': lambda number: number % 2 == 0,
+        'date': lambda number: datetime.date(2000, 1, 1) + datetime.timedelta(days=number % 9999),
+        'datetime': lambda number: datetime.datetime(2000, 1, 1, 12, 30, number % 60),
+    }
+    return [[values[field['type']](number) for field in descriptor['fields']]
+            for number in range(size)]
+
+
+def _measure(function, memory=False):
+    peak = None
+    if memory and tracemalloc:
+        tracemalloc.start()
+    start = time.time()
+    function()
+    seconds = time.time() - start
+    if memory and tracemalloc:
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def _consume(iterator):
+    for _ in iterator:
+        pass
+
+
+_KEYS = [
+    'rows', 'columns', 'convert_us_per_cell', 'restore_us_per_cell',
+    'write_rows_per_sec', 'trusted_write_rows_per_sec', 'processes_write_rows_per_sec',
+    'write_peak_mb',
+    'iter_rows_per_sec', 'iter_peak_mb',
+]
+
+
+# Main
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=benchmark.__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--widths', type=int, nargs='+', default=[5, 20])
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    results = benchmark(
+        sizes=args.sizes, widths=args.widths, latency=args.latency, processes=args.processes)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        print('  '.join('%28s' % key for key in _KEYS))
+        for result in results:
+            values = []
+            for key in _KEYS:
+                value = result[key]
+                if value is None:
+                    value = '-'
+                elif isinstance(value, float):
+                    value = '%.2f' % value
+                values.append('%28s' % value)
+            print('  '.join(values))
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import sys
+
+
+# Collection
+
+collect_ignore = []
+if sys.version_info < (3, 6):
+    collect_ignore.append('test_async_storage.py')
@@ -0,0 +1,528 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import io
+import os
+import re
+import six
+import json
+import time
+import uuid
+import operator
+import httplib2
+import unicodecsv
+from copy import deepcopy
+from dateutil.parser import parse
+from apiclient.errors import HttpError
+
+
+# Module API
+
+class FakeService(object):
+    """In-process fake of the BigQuery `Service` object
+
+    It implements the `tables`, `tabledata` and `jobs` endpoints used by
+    `Storage` including pagination, HTTP batches and asynchronous job states.
+    Tables are stored in memory as lists of rows of canonical BigQuery strings.
+
+    # Arguments
+        page_size (int): max number of rows in a `tabledata.list` page
+        latency (float): delay in seconds added to every HTTP request
+        job_polls (int): number of polls before a job becomes `DONE`
+        sink (LocalSink): sink to write extract job shards to
+        shard_size (int): number of rows in an extracted shard
+        upload_errors (int):
+            number of resumable upload requests failing
+            with a retryable `503` error
+        request_errors (int):
+            number of other not batched requests failing
+            with a retryable `503` error
+
+    """
+
+    # Public
+
+    def __init__(self, page_size=100000, latency=0, job_polls=0, sink=None, shard_size=1000,
+                 upload_errors=0, request_errors=0):
+        self.page_size = page_size
+        self.latency = latency
+        self.job_polls = job_polls
+        self.sink = sink
+        self.shard_size = shard_size
+        self.upload_errors = upload_errors
+        self.request_errors = request_errors
+        self.tables_ = {}
+        self.jobs_ = {}
+        self.queries = []
+        self.https = set()
+        self.calls = 0
+        self.batches = 0
+        self.uploads = 0
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def tables(self):
+        return _Tables(self)
+
+    def tabledata(self):
+        return _Tabledata(self)
+
+    def jobs(self):
+        return _Jobs(self)
+
+    def get_rows(self, project, dataset, table):
+        """Get table rows as canonical strings
+        """
+        return self.tables_[(project, dataset, table)]['rows']
+
+    # Private
+
+    def _request(self, http=None):
+        self.https.add(http)
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeRequest(object):
+    """Not executed fake API request
+    """
+
+    # Public
+
+    def __init__(self, service, function):
+        self.service = service
+        self.function = function
+
+    def execute(self, http=None, num_retries=0):
+        for retry in range(num_retries + 1):
+            self.service._request(http)
+            if not self.service.request_errors:
+                return self.function()
+            self.service.request_errors -= 1
+        raise HttpError(httplib2.Response({'status': 503}), b'Service Unavailable')
+
+    def next_chunk(self, http=None, num_retries=0):
+        return None, self.execute(http=http, num_retries=num_retries)
+
+
+class FakeUpload(FakeRequest):
+    """Not executed fake resumable upload
+
+    Every `next_chunk` call sends one `chunksize` part of the media body
+    (failed parts are retried up to `num_retries` times like the client does).
+
+    """
+
+    # Public
+
+    def __init__(self, service, function, media_body):
+        super(FakeUpload, self).__init__(service, function)
+        self.media_body = media_body
+        self.data = b''
+
+    def next_chunk(self, http=None, num_retries=0):
+        for retry in range(num_retries + 1):
+            self.service._request(http)
+            self.service.uploads += 1
+            if not self.service.upload_errors:
+                break
+            self.service.upload_errors -= 1
+        else:
+            raise HttpError(httplib2.Response({'status': 503}), b'Service Unavailable')
+        self.data += self.media_body.getbytes(len(self.data), self.media_body.chunksize())
+        if len(self.data) < self.media_body.size():
+            return len(self.data), None
+        return None, self.function()
+
+
+class FakeBatch(object):
+    """Fake HTTP batch request
+    """
+
+    # Public
+
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        self.service._request(http)
+        self.service.batches += 1
+        for request_id, request in self.requests:
+            try:
+                response, exception = request.function(), None
+            except Exception as error:
+                response, exception = None, error
+            self.callback(request_id, response, exception)
+
+
+# Internal
+
+class _Tables(object):
+
+    def __init__(self, service):
+        self.__service = service
+
+    def list(self, projectId, datasetId, pageToken=None, maxResults=50):
+        def function():
+            names = sorted(
+                key[2] for key in self.__service.tables_ if key[:2] == (projectId, datasetId))
+            start = int(pageToken or 0)
+            response = {'tables': [
+                {'tableReference': {'tableId': name}}
+                for name in names[start:start + maxResults]]}
+            if start + maxResults < len(names):
+                response['nextPageToken'] = str(start + maxResults)
+            return response
+        return FakeRequest(self.__service, function)
+
+    def insert(self, projectId, datasetId, body):
+        def function():
+            key = (projectId, datasetId, body['tableReference']['tableId'])
+            if key in self.__service.tables_:
+                raise Exception('Already Exists: Table %s' % key[2])
+            self.__service.tables_[key] = {'resource': body, 'rows': [], 'insert_ids': set()}
+            return body
+        return FakeRequest(self.__service, function)
+
+    def delete(self, projectId, datasetId, tableId):
+        def function():
+            del self.__service.tables_[(projectId, datasetId, tableId)]
+            return ''
+        return FakeRequest(self.__service, function)
+
+    def get(self, projectId, datasetId, tableId):
+        def function():
+            table = self.__service.tables_[(projectId, datasetId, tableId)]
+            response = dict(table['resource'])
+            buffered = table.get('buffered', 0)
+            response['numRows'] = str(len(table['rows']) - buffered)
+            if buffered:
+                # Estimate is rough (rows are never flushed from the streaming buffer)
+                response['streamingBuffer'] = {'estimatedRows': str(buffered // 2)}
+            return response
+        return FakeRequest(self.__service, function)
+
+
+class _Tabledata(object):
+
+    def __init__(self, service):
+        self.__service = service
+
+    def list(self, projectId, datasetId, tableId,
+             maxResults=None, startIndex=None, pageToken=None):
+        def function():
+            rows = self.__service.tables_[(projectId, datasetId, tableId)]['rows']
+            start = int(pageToken) if pageToken else int(startIndex or 0)
+            return _get_page(rows, start, maxResults, self.__service.page_size)
+        return FakeRequest(self.__service, function)
+
+    def insertAll(self, projectId, datasetId, tableId, body):
+        def function():
+            table = self.__service.tables_[(projectId, datasetId, tableId)]
+            fields = table['resource']['schema']['fields']
+            errors = []
+            for index, item in enumerate(body['rows']):
+                json.dumps(item)
+                if item['insertId'] in table['insert_ids']:
+                    continue
+                try:
+                    row = [_canonicalize(_stringify(item['json'].get(field['name'])), field)
+                           for field in fields]
+                except Exception as exception:
+                    errors.append({'index': index, 'errors': [
+                        {'reason': 'invalid', 'message': str(exception)}]})
+                    continue
+                table['insert_ids'].add(item['insertId'])
+                table['rows'].append(row)
+                table['buffered'] = table.get('buffered', 0) + 1
+            return {'insertErrors': errors} if errors else {}
+        return FakeRequest(self.__service, function)
+
+
+class _Jobs(object):
+
+    def __init__(self, service):
+        self.__service = service
+
+    def insert(self, projectId, body, media_body=None):
+        def function():
+            config = body['configuration']
+            job = {
+                'jobReference': {
+                    'projectId': projectId,
+                    'jobId': body.get('jobReference', {}).get('jobId') or uuid.uuid4().hex,
+                },
+                'status': {'state': 'RUNNING'},
+                'polls': 0,
+            }
+            try:
+                if 'load' in config:
+                    _run_load(self.__service, config['load'], request.data)
+                elif 'query' in config:
+                    self.__service.queries.append(config['query'])
+                    job['result'] = _run_query(
+                        self.__service, config['query']['query'],
+                        config['query'].get('queryParameters', []))
+                elif 'copy' in config:
+                    _run_copy(self.__service, config['copy'])
+                elif 'extract' in config:
+                    _run_extract(self.__service, config['extract'])
+            except ValueError as exception:
+                job['errors'] = [{'message': str(exception)}]
+            self.__service.jobs_[job['jobReference']['jobId']] = job
+            return {'jobReference': job['jobReference'], 'status': dict(job['status'])}
+        if media_body is not None:
+            request = FakeUpload(self.__service, function, media_body)
+            return request
+        return FakeRequest(self.__service, function)
+
+    def get(self, projectId, jobId):
+        def function():
+            job = self.__service.jobs_[jobId]
+            job['polls'] += 1
+            if job['polls'] > self.__service.job_polls:
+                job['status'] = {'state': 'DONE'}
+                if 'errors' in job:
+                    job['status']['errors'] = job['errors']
+            return {'jobReference': job['jobReference'], 'status': dict(job['status'])}
+        return FakeRequest(self.__service, function)
+
+    def getQueryResults(self, projectId, jobId, maxResults=None, pageToken=None):
+        def function():
+            rows = self.__service.jobs_[jobId]['result']
+            return _get_page(rows, int(pageToken or 0), maxResults, self.__service.page_size)
+        return FakeRequest(self.__service, function)
+
+
+def _get_page(rows, start, max_results, page_size):
+    size = min(max_results or page_size, page_size)
+    response = {
+        'totalRows': str(len(rows)),
+        'rows': [{'f': [{'v': value} for value in row]} for row in rows[start:start + size]],
+    }
+    if start + size < len(rows):
+        response['pageToken'] = str(start + size)
+    return response
+
+
+def _get_table(service, reference):
+    return service.tables_[
+        (reference['projectId'], reference['datasetId'], reference['tableId'])]
+
+
+def _run_load(service, load, data):
+    table = _get_table(service, load['destinationTable'])
+    fields = table['resource']['schema']['fields']
+    names = [field['name'] for field in fields]
+    source_format = load.get('sourceFormat', 'CSV')
+    if source_format == 'CSV':
+        records = list(unicodecsv.reader(io.BytesIO(data), encoding='utf-8'))
+    elif source_format == 'NEWLINE_DELIMITED_JSON':
+        records = []
+        for line in data.decode('utf-8').splitlines():
+            record = json.loads(line)
+            records.append([_stringify(record.get(name)) for name in names])
+    elif source_format == 'AVRO':
+        import fastavro
+        records = [[_stringify(record.get(name)) for name in names]
+                   for record in fastavro.reader(io.BytesIO(data))]
+    rows = [[_canonicalize(value, field) for value, field in zip(record, fields)]
+            for record in records]
+    if load.get('writeDisposition') == 'WRITE_TRUNCATE':
+        table['rows'] = []
+        table['buffered'] = 0
+    table['rows'].extend(rows)
+
+
+def _run_copy(service, copy):
+    source = _get_table(service, copy['sourceTable'])
+    table = _get_table(service, copy['destinationTable'])
+    for key in ['timePartitioning', 'rangePartitioning', 'clustering']:
+        if source['resource'].get(key) != table['resource'].get(key):
+            raise ValueError('Incompatible table partitioning specification')
+    if copy.get('writeDisposition') == 'WRITE_TRUNCATE':
+        table['resource']['schema'] = deepcopy(source['resource']['schema'])
+        table['rows'] = []
+        table['buffered'] = 0
+    table['rows'].extend(source['rows'])
+
+
+def _run_query(service, sql, parameters):
+    if sql.startswith('MERGE '):
+        return _run_merge(service, sql)
+    pattern = (
+        r'SELECT (.*?) FROM `([^`]*)`'
+        r'(?: WHERE (.*?))?(?: ORDER BY (.*?))?(?: LIMIT (\d+))?$')
+    select, path, where, order_by, limit = re.match(pattern, sql).groups()
+    table = service.tables_[tuple(path.split('.'))]
+    fields = table['resource']['schema']['fields']
+    names = [field['name'] for field in fields]
+    rows = list(table['rows'])
+
+    # Where (conjunction of simple comparisons)
+    if where:
+        values = dict((parameter['name'], parameter['parameterValue'].get('value'))
+                      for parameter in parameters)
+        types = dict((parameter['name'], parameter['parameterType']['type'])
+                     for parameter in parameters)
+        for condition in where.split(' AND '):
+            name, operation, argument = _parse_condition(condition, names)
+            index = names.index(name)
+            cast = _get_cast(fields[index])
+            if argument.startswith('@'):
+                _check_parameter_type(fields[index], types[argument[1:]])
+                argument = values[argument[1:]]
+            if argument is None:
+                rows = []
+                break
+            argument = cast(argument.strip("'"))
+            compare = _OPERATIONS[operation]
+            rows = [row for row in rows
+                    if row[index] is not None and compare(cast(row[index]), argument)]
+
+    # Order by
+    if order_by:
+        for item in reversed(order_by.split(', ')):
+            reverse = item.endswith(' DESC')
+            index = names.index(item.split(' ')[0].strip('`'))
+            cast = _get_cast(fields[index])
+            rows.sort(reverse=reverse, key=lambda row: (
+                row[index] is not None, cast(row[index]) if row[index] is not None else 0))
+
+    # Limit
+    if limit:
+        rows = rows[:int(limit)]
+
+    # Select
+    if select != '*':
+        indexes = [names.index(name.strip('`')) for name in select.split(', ')]
+        rows = [[row[index] for index in indexes] for row in rows]
+
+    return rows
+
+
+def _parse_condition(condition, names):
+    match = re.match(r'^`?(\w+)`?\s*(>=|<=|!=|=|>|<)\s*(.+)$', condition.strip())
+    if match is not None and match.group(1) in names:
+        return match.groups()
+    match = re.match(r'^(.+?)\s*(>=|<=|!=|=|>|<)\s*`?(\w+)`?$', condition.strip())
+    argument, operation, name = match.groups()
+    return name, _REVERSED_OPERATIONS.get(operation, operation), argument
+
+
+def _check_parameter_type(field, type):
+    # Numbers are coerced to each other
+    type = _PARAMETER_TYPES.get(type, type)
+    if {field['type'], type} != {'INTEGER', 'FLOAT'} and field['type'] != type:
+        message = 'No matching signature for operator for argument types: %s, %s'
+        raise ValueError(message % (field['type'], type))
+
+
+_PARAMETER_TYPES = {'INT64': 'INTEGER', 'FLOAT64': 'FLOAT', 'BOOL': 'BOOLEAN'}
+
+
+def _run_merge(service, sql):
+    pattern = r'MERGE `([^`]*)` T USING `([^`]*)` S ON (.*?) WHEN'
+    target_path, source_path, condition = re.match(pattern, sql).groups()
+    target = service.tables_[tuple(target_path.split('.'))]
+    source = service.tables_[tuple(source_path.split('.'))]
+    names = [field['name'] for field in target['resource']['schema']['fields']]
+    keys = [names.index(name) for name in re.findall(r'T\.`(\w+)`', condition)]
+    indexes = dict((tuple(row[index] for index in keys), position)
+                   for position, row in enumerate(target['rows']))
+    for row in source['rows']:
+        key = tuple(row[index] for index in keys)
+        if key in indexes:
+            target['rows'][indexes[key]] = list(row)
+        else:
+            indexes[key] = len(target['rows'])
+            target['rows'].append(list(row))
+    return []
+
+
+def _run_extract(service, extract):
+    table = _get_table(service, extract['sourceTable'])
+    names = [field['name'] for field in table['resource']['schema']['fields']]
+    rows = table['rows']
+    pattern = extract['destinationUris'][0]
+    destination_format = extract['destinationFormat']
+    for number, start in enumerate(range(0, max(len(rows), 1), service.shard_size)):
+        path = service.sink.get_path(pattern.replace('*', '%012d' % number))
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        shard = rows[start:start + service.shard_size]
+        with io.open(path, 'wb') as file:
+            if destination_format == 'CSV':
+                writer = unicodecsv.writer(file, encoding='utf-8')
+                writer.writerows([['' if value is None else value for value in row]
+                                  for row in shard])
+            elif destination_format == 'NEWLINE_DELIMITED_JSON':
+                for row in shard:
+                    record = dict((name, value)
+                                  for name, value in zip(names, row) if value is not None)
+                    file.write((json.dumps(record) + '\n').encode('utf-8'))
+            elif destination_format == 'AVRO':
+                import fastavro
+                schema = {'type': 'record', 'name': 'Row', 'fields': [
+                    {'name': name, 'type': ['null', 'string']} for name in names]}
+                fastavro.writer(file, fastavro.parse_schema(schema),
+                                [dict(zip(names, row)) for row in shard])
+
+
+def _canonicalize(value, field):
+    if value == '':
+        return None
+    if field['type'] == 'INTEGER':
+        return str(int(value))
+    if field['type'] == 'FLOAT':
+        return repr(float(value))
+    if field['type'] == 'BOOLEAN':
+        return 'true' if value.lower() == 'true' else 'false'
+    if field['type'] in _TEMPORAL_PATTERNS:
+        if _TEMPORAL_PATTERNS[field['type']].match(value):
+            return value.replace(' ', 'T')
+        value = parse(value)
+        if field['type'] == 'DATETIME':
+            return value.replace(tzinfo=None).isoformat()
+        if field['type'] == 'DATE':
+            return value.date().isoformat()
+        return value.time().isoformat()
+    return value
+
+
+def _stringify(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return six.text_type(value)
+
+
+def _get_cast(field):
+    return {'INTEGER': int, 'FLOAT': float}.get(field['type'], lambda value: value)
+
+
+_TEMPORAL_PATTERNS = {
+    'DATETIME': re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?$'),
+    'DATE': re.compile(r'^\d{4}-\d{2}-\d{2}$'),
+    'TIME': re.compile(r'^\d{2}:\d{2}:\d{2}(\.\d+)?$'),
+}
+_OPERATIONS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+_REVERSED_OPERATIONS = {'>': '<', '>=': '<=', '<': '>', '<=': '>='}
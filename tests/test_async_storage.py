@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import asyncio
+import httplib2
+from tableschema_bigquery import AsyncStorage
+from .fake import FakeService
+
+
+# Tests
+
+def test_async_storage():
+    descriptor = {'fields': [{'name': 'id', 'type': 'integer'}]}
+    data = [[value] for value in range(0, 1500)]
+
+    async def run():
+        storage = AsyncStorage(FakeService(), project='project', dataset='dataset')
+        await storage.create('bucket', descriptor)
+        await storage.write('bucket', data)
+        buckets = await storage.buckets()
+        rows = [row async for row in storage.iter('bucket', rows_per_batch=100)]
+        storage.close()
+        return buckets, rows
+
+    loop = asyncio.new_event_loop()
+    buckets, rows = loop.run_until_complete(run())
+    loop.close()
+    assert buckets == ['bucket']
+    assert rows == data
+
+
+def test_async_storage_gather():
+    descriptor = {'fields': [{'name': 'id', 'type': 'integer'}]}
+    buckets = ['bucket%s' % index for index in range(4)]
+    service = FakeService(latency=0.01)
+    service._http = httplib2.Http()
+
+    async def copy(storage, bucket, data):
+        await storage.create(bucket, descriptor)
+        await storage.write(bucket, data)
+        return await storage.read(bucket)
+
+    async def run():
+        storage = AsyncStorage(service, project='project', dataset='dataset', concurrency=4)
+        results = await asyncio.gather(*[
+            copy(storage, bucket, [[index]] * 10) for index, bucket in enumerate(buckets)])
+        storage.close()
+        return results
+
+    loop = asyncio.new_event_loop()
+    results = loop.run_until_complete(run())
+    loop.close()
+    assert results == [[[index]] * 10 for index in range(len(buckets))]
+
+    # Every thread has its own transport
+    assert None not in service.https
+    assert service._http not in service.https
+    assert len(service.https) > 1
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import time
+import httplib2
+from apiclient.errors import HttpError
+from tableschema_bigquery.batch import execute_requests
+from tableschema_bigquery.transport import HttpPool
+
+
+# Tests
+
+def test_execute_requests_batch():
+    service = Service()
+    requests = [Request(index) for index in range(5)] + [Request(None)]
+    results = execute_requests(service, requests, batch_size=4)
+    assert [response for response, _ in results] == [0, 1, 2, 3, 4, None]
+    assert isinstance(results[-1][1], ValueError)
+    assert service.batches == 2
+
+
+def test_execute_requests_batch_retries(monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    service = Service()
+    requests = [
+        Request(0, failures=2), Request(1), Request(None), Request(3, failures=1, status=404)]
+    results = execute_requests(service, requests, batch_size=10, num_retries=2)
+    assert [response for response, _ in results] == [0, 1, None, None]
+    assert [request.calls for request in requests] == [3, 1, 1, 1]
+    assert service.batches == 3
+
+    # Retries exhausted
+    requests = [Request(0, failures=2), Request(1)]
+    results = execute_requests(service, requests, batch_size=10, num_retries=1)
+    assert isinstance(results[0][1], HttpError)
+    assert results[1] == (1, None)
+
+
+def test_execute_requests_single():
+    service = Service()
+    requests = [Request(index) for index in range(5)] + [Request(None)]
+    results = execute_requests(service, requests, workers=3)
+    assert [response for response, _ in results] == [0, 1, 2, 3, 4, None]
+    assert isinstance(results[-1][1], ValueError)
+    assert service.batches == 0
+
+
+def test_execute_requests_http_pool():
+    pool = HttpPool(object)
+    requests = [Request(index) for index in range(4)]
+    results = execute_requests(Service(), requests, workers=2, http_pool=pool)
+    assert [response for response, _ in results] == [0, 1, 2, 3]
+    assert all(request.http is not None for request in requests)
+    assert 1 <= len(pool) <= 2
+
+
+# Helpers
+
+class Service(object):
+
+    def __init__(self):
+        self.batches = 0
+
+    def new_batch_http_request(self, callback):
+        self.batches += 1
+        return Batch(callback)
+
+
+class Batch(object):
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except Exception as exception:
+                self.callback(request_id, None, exception)
+
+
+class Request(object):
+
+    def __init__(self, response, failures=0, status=503):
+        self.response = response
+        self.failures = failures
+        self.status = status
+        self.calls = 0
+
+    def execute(self, http=None, num_retries=0):
+        self.http = http
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise HttpError(httplib2.Response({'status': self.status}), b'Error')
+        if self.response is None:
+            raise ValueError('Bad request')
+        return self.response
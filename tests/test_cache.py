@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import time
+import pytest
+import tableschema
+from tableschema_bigquery import MetadataCache
+
+
+# Tests
+
+def test_metadata_cache():
+    cache = MetadataCache()
+    cache.set('key1', ['table1'])
+    cache.set('key2', {'fields': []})
+    assert cache.get('key1') == ['table1']
+    cache.invalidate('key1')
+    assert cache.get('key1') is None
+    assert cache.get('key2') == {'fields': []}
+    cache.invalidate()
+    assert cache.get('key2') is None
+
+
+def test_metadata_cache_ttl():
+    cache = MetadataCache(ttl=0.05)
+    cache.set('key', ['table'])
+    assert cache.get('key') == ['table']
+    time.sleep(0.1)
+    assert cache.get('key') is None
+
+
+def test_metadata_cache_path(tmpdir):
+    path = str(tmpdir.join('cache.json'))
+    cache = MetadataCache(ttl=60, path=path)
+    cache.set('key1', ['table1'])
+    cache.set_many({'key2': ['table2'], 'key3': ['table3']})
+    cache.invalidate('key2')
+    cache = MetadataCache(ttl=60, path=path)
+    assert cache.get('key1') == ['table1']
+    assert cache.get('key2') is None
+    assert cache.get('key3') == ['table3']
+    with pytest.raises(tableschema.exceptions.StorageError):
+        MetadataCache(path=path)
+
+
+def test_metadata_cache_path_shared(tmpdir):
+    path = str(tmpdir.join('cache.json'))
+    cache1 = MetadataCache(ttl=60, path=path)
+    cache2 = MetadataCache(ttl=60, path=path)
+    cache1.set('key1', ['table1'])
+    cache2.set('key2', ['table2'])
+    cache1.set('key2', ['table2', 'table3'])
+    cache = MetadataCache(ttl=60, path=path)
+    assert cache.get('key1') == ['table1']
+    assert cache.get('key2') == ['table2', 'table3']
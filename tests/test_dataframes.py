@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pytest
+import datetime
+import tableschema
+from tableschema_bigquery import Storage, MetricsTracer
+from .fake import FakeService
+pandas = pytest.importorskip('pandas')
+
+
+# Resources
+
+DESCRIPTOR = {
+    'fields': [
+        {'name': 'id', 'type': 'integer'},
+        {'name': 'name', 'type': 'string'},
+        {'name': 'current', 'type': 'boolean'},
+        {'name': 'rating', 'type': 'number'},
+        {'name': 'date', 'type': 'date'},
+        {'name': 'datetime', 'type': 'datetime'},
+        {'name': 'time', 'type': 'time'},
+        {'name': 'object', 'type': 'object'},
+    ],
+    'primaryKey': 'id',
+}
+FRAME = {
+    'id': [1, 2, 9007199254740993],
+    'name': ['Taxes', '中国人', None],
+    'current': [True, False, None],
+    'rating': [9.5, 7.0, None],
+    'date': pandas.to_datetime(['2020-01-01', '2020-01-02', None]),
+    'datetime': [
+        pandas.Timestamp('2020-01-01T10:00:00'), pandas.Timestamp('2020-01-02T10:00:00.5'), None],
+    'time': pandas.to_timedelta(['10:00:00', '11:30:00', None]),
+    'object': [{'key': 'value'}, None, None],
+}
+
+
+# Tests
+
+def test_storage_dataframe():
+    tracer = MetricsTracer()
+    storage = Storage(FakeService(page_size=2), project='project', dataset='dataset',
+                      tracer=tracer)
+    storage.create('bucket', DESCRIPTOR)
+    storage.write_dataframe('bucket', pandas.DataFrame(FRAME), chunk_rows=2)
+    frame = storage.read_dataframe('bucket')
+    assert list(frame.columns) == [field['name'] for field in DESCRIPTOR['fields']]
+    assert list(frame['id']) == FRAME['id']
+    assert str(frame['id'].dtype) == 'Int64'
+    assert str(frame['current'].dtype) == 'boolean'
+    assert frame['rating'][0] == 9.5
+    assert frame['date'][1] == pandas.Timestamp('2020-01-02')
+    assert frame['datetime'][1] == pandas.Timestamp('2020-01-02T10:00:00.5')
+    assert frame['time'][1] == datetime.timedelta(hours=11, minutes=30)
+    assert frame['object'][0] == '{"key": "value"}'
+    assert frame.iloc[2].isna().sum() == 7
+    assert tracer.metrics['storage.encode']['rows'] == 3
+    assert tracer.metrics['storage.restore']['rows'] == 3
+    assert storage.read('bucket')[0][:2] == [1, 'Taxes']
+
+    # Modes
+    frame = pandas.DataFrame(FRAME).iloc[:1]
+    storage.write_dataframe('bucket', frame.assign(name='Updated'), mode='upsert')
+    assert list(storage.read_dataframe('bucket', workers=2)['name'])[:1] == ['Updated']
+    storage.write_dataframe('bucket', frame.iloc[:0], mode='truncate')
+    assert len(storage.read_dataframe('bucket')) == 0
+
+
+def test_storage_dataframe_missing_column():
+    storage = Storage(FakeService(), project='project', dataset='dataset')
+    storage.create('bucket', DESCRIPTOR)
+    with pytest.raises(tableschema.exceptions.StorageError):
+        storage.write_dataframe('bucket', pandas.DataFrame({'id': [1]}))
+
+
+def test_storage_dataframe_timestamps():
+    service = FakeService()
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.create('bucket', {'fields': [{'name': 'moment', 'type': 'datetime'}]})
+
+    # TIMESTAMP columns are returned as epoch seconds
+    service.tables_[('project', 'dataset', 'bucket')]['rows'] = [['-1.0E9'], ['1.5E9'], [None]]
+    frame = storage.read_dataframe('bucket')
+    assert frame['moment'][0] == pandas.Timestamp('1938-04-24T22:13:20')
+    assert frame['moment'][1] == pandas.Timestamp('2017-07-14T02:40:00')
+    assert frame['moment'].isna()[2]
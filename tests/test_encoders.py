@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import io
+import json
+import pytest
+import datetime
+from decimal import Decimal
+from tableschema_bigquery.encoders import CsvEncoder, JsonEncoder, AvroEncoder
+
+
+# Resources
+
+DESCRIPTOR = {
+    'fields': [
+        {'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED'},
+        {'name': 'rating', 'type': 'FLOAT', 'mode': 'NULLABLE'},
+        {'name': 'date', 'type': 'DATE', 'mode': 'NULLABLE'},
+        {'name': 'datetime', 'type': 'DATETIME', 'mode': 'NULLABLE'},
+        {'name': 'name', 'type': 'STRING', 'mode': 'NULLABLE'},
+    ],
+}
+ROWS = [
+    [1, Decimal('9.5'), datetime.date(2015, 1, 1), datetime.datetime(2015, 1, 1, 3), '中国人'],
+    [2, None, None, None, None],
+]
+
+
+# Tests
+
+def test_encoders_csv():
+    stream = io.BytesIO()
+    encoder = CsvEncoder(stream, DESCRIPTOR)
+    for row in ROWS:
+        encoder.write(row)
+    encoder.close()
+    assert stream.getvalue().decode('utf-8').splitlines() == [
+        '1,9.5,2015-01-01,2015-01-01 03:00:00,中国人',
+        '2,,,,',
+    ]
+
+
+def test_encoders_json():
+    stream = io.BytesIO()
+    encoder = JsonEncoder(stream, DESCRIPTOR)
+    for row in ROWS:
+        encoder.write(row)
+    encoder.close()
+    lines = stream.getvalue().decode('utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'id': 1, 'rating': 9.5, 'date': '2015-01-01',
+         'datetime': '2015-01-01 03:00:00', 'name': '中国人'},
+        {'id': 2, 'rating': None, 'date': None, 'datetime': None, 'name': None},
+    ]
+
+
+def test_encoders_json_convert():
+    encoder = JsonEncoder(None, DESCRIPTOR)
+    assert encoder.convert(ROWS[0]) == {
+        'id': 1, 'rating': 9.5, 'date': '2015-01-01',
+        'datetime': '2015-01-01 03:00:00', 'name': '中国人'}
+
+
+def test_encoders_avro():
+    fastavro = pytest.importorskip('fastavro')
+    stream = io.BytesIO()
+    encoder = AvroEncoder(stream, DESCRIPTOR)
+    for row in ROWS:
+        encoder.write(row)
+    encoder.close()
+    stream.seek(0)
+    assert list(fastavro.reader(stream)) == [
+        {'id': 1, 'rating': 9.5, 'date': datetime.date(2015, 1, 1),
+         'datetime': '2015-01-01 03:00:00', 'name': '中国人'},
+        {'id': 2, 'rating': None, 'date': None, 'datetime': None, 'name': None},
+    ]
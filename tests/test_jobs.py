@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import time
+import pytest
+import httplib2
+import tableschema
+from apiclient.errors import HttpError
+from tableschema_bigquery.jobs import JobWaiter, get_job_errors
+
+
+# Tests
+
+def test_job_waiter_wait_all():
+    service = Service({'job1': ['RUNNING', 'DONE'], 'job2': ['RUNNING', 'RUNNING', 'DONE']})
+    waiter = JobWaiter(service, initial_delay=0.001)
+    results = waiter.wait_all([job('job1'), job('job2'), job('job3', state='DONE')])
+    assert [result['status']['state'] for result in results] == ['DONE', 'DONE', 'DONE']
+    assert service.polls == {'job1': 2, 'job2': 3}
+
+
+def test_job_waiter_wait_errors():
+    service = Service({'job1': ['DONE'], 'job2': ['DONE']}, errors={'job2': 'Bad row'})
+    waiter = JobWaiter(service, initial_delay=0.001)
+    with pytest.raises(tableschema.exceptions.StorageError) as excinfo:
+        waiter.wait_all([job('job1'), job('job2')])
+    assert 'Bad row' in str(excinfo.value)
+    assert service.polls == {'job1': 1, 'job2': 1}
+
+
+def test_job_waiter_wait_some():
+    service = Service({'job1': ['RUNNING', 'DONE'], 'job2': ['RUNNING'] * 3},
+                      errors={'job1': 'Bad row'})
+    waiter = JobWaiter(service, initial_delay=0.001)
+    finished, unfinished = waiter.wait_some([job('job1'), job('job2')], max_pending=1)
+    assert [result['jobReference']['jobId'] for result in finished] == ['job1']
+    assert [result['jobReference']['jobId'] for result in unfinished] == ['job2']
+    assert get_job_errors(finished) == ['Bad row']
+    assert service.polls == {'job1': 2, 'job2': 2}
+
+
+def test_job_waiter_wait_timeout():
+    service = Service({'job1': ['RUNNING'] * 1000})
+    waiter = JobWaiter(service, initial_delay=0.01, timeout=0.05)
+    with pytest.raises(tableschema.exceptions.StorageError) as excinfo:
+        waiter.wait(job('job1'))
+    assert 'job1' in str(excinfo.value)
+
+
+def test_job_waiter_wait_retries():
+    service = Service({'job1': ['RUNNING', 'DONE']}, failures={'job1': 2})
+    waiter = JobWaiter(service, initial_delay=0.001, num_retries=2)
+    assert waiter.wait(job('job1'))['status']['state'] == 'DONE'
+    service = Service({'job1': ['RUNNING', 'DONE']}, failures={'job1': 2})
+    waiter = JobWaiter(service, initial_delay=0.001, num_retries=1)
+    with pytest.raises(HttpError):
+        waiter.wait(job('job1'))
+
+
+def test_job_waiter_wait_retries_batch(monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    service = Service({'job1': ['DONE'], 'job2': ['DONE']}, failures={'job1': 1})
+    waiter = JobWaiter(service, initial_delay=0.001, num_retries=1, batch_size=100)
+    results = waiter.wait_all([job('job1'), job('job2')])
+    assert [result['status']['state'] for result in results] == ['DONE', 'DONE']
+    assert service.batches == 2
+
+
+# Helpers
+
+def job(id, state='RUNNING', errors=None):
+    result = {'jobReference': {'projectId': 'project', 'jobId': id}, 'status': {'state': state}}
+    if errors:
+        result['status']['errors'] = [{'message': errors}]
+    return result
+
+
+class Service(object):
+
+    def __init__(self, states, errors={}, failures={}):
+        self.states = states
+        self.errors = errors
+        self.failures = dict(failures)
+        self.polls = {}
+        self.batches = 0
+
+    def new_batch_http_request(self, callback):
+        self.batches += 1
+        return Batch(callback)
+
+    def jobs(self):
+        return self
+
+    def get(self, projectId, jobId):
+        self.polls[jobId] = self.polls.get(jobId, 0) + 1
+        state = self.states[jobId][self.polls[jobId] - 1]
+        errors = self.errors.get(jobId) if state == 'DONE' else None
+        return Request(self, jobId, job(jobId, state=state, errors=errors))
+
+
+class Batch(object):
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except HttpError as exception:
+                self.callback(request_id, None, exception)
+
+
+class Request(object):
+
+    def __init__(self, service, id, result):
+        self.service = service
+        self.id = id
+        self.result = result
+
+    def execute(self, http=None, num_retries=0):
+        # Retryable errors are retried by the client up to `num_retries` times
+        for retry in range(num_retries + 1):
+            if not self.service.failures.get(self.id):
+                return self.result
+            self.service.failures[self.id] -= 1
+        raise HttpError(httplib2.Response({'status': 503}), b'Service Unavailable')
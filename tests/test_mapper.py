@@ -5,6 +5,9 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import pytest
+import datetime
+import tableschema
+from decimal import Decimal
 from tableschema_bigquery.mapper import Mapper
 
 
@@ -13,9 +16,112 @@ from tableschema_bigquery.mapper import Mapper
 def test_mapper_convert_bucket():
     mapper = Mapper('prefix_')
     assert mapper.convert_bucket('bucket') == 'prefix_bucket'
+    with pytest.raises(tableschema.exceptions.StorageError):
+        Mapper('').convert_bucket('_staging_bucket')
 
 
 def test_mapper_restore_bucket():
     mapper = Mapper('prefix_')
     assert mapper.restore_bucket('prefix_bucket') == 'bucket'
     assert mapper.restore_bucket('xxxxxx_bucket') == None
+    staging_name = mapper.convert_staging_table('prefix_bucket', 'suffix')
+    assert Mapper('').restore_bucket(staging_name) is None
+
+
+def test_mapper_convert_field_name():
+    mapper = Mapper('prefix_')
+    assert mapper.convert_field_name('name') == 'name'
+    assert mapper.convert_field_name('full name') == 'full_name'
+    assert mapper.convert_field_name('1st') == '_1st'
+
+
+def test_mapper_convert_table_options():
+    mapper = Mapper('prefix_')
+    descriptor = {
+        'fields': [
+            {'name': 'id', 'type': 'integer'},
+            {'name': 'created date', 'type': 'date'},
+        ],
+        'primaryKey': 'id',
+        'partitioning': 'created date',
+        'clustering': True,
+    }
+    assert mapper.convert_table_options({'fields': descriptor['fields']}) == {}
+    assert mapper.convert_table_options(descriptor) == {
+        'timePartitioning': {'field': 'created_date', 'type': 'DAY'},
+        'clustering': {'fields': ['id']},
+    }
+    partitioning = {'field': 'id', 'range': {'start': 0, 'end': 100, 'interval': 10}}
+    options = mapper.convert_table_options(
+        descriptor, partitioning=partitioning, clustering=['created date'])
+    assert options == {
+        'rangePartitioning': partitioning,
+        'clustering': {'fields': ['created_date']},
+    }
+    with pytest.raises(tableschema.exceptions.StorageError):
+        mapper.convert_table_options(descriptor, partitioning='id')
+    with pytest.raises(tableschema.exceptions.StorageError):
+        mapper.convert_table_options(descriptor, clustering=['non_existent'])
+
+
+def test_mapper_compile_row_converter():
+    mapper = Mapper('prefix_')
+    schema = tableschema.Schema({'fields': [
+        {'name': 'id', 'type': 'integer'},
+        {'name': 'name', 'type': 'string'},
+        {'name': 'date', 'type': 'date'},
+        {'name': 'stats', 'type': 'object'},
+    ]})
+    converter = mapper.compile_row_converter(schema, [3])
+    assert mapper.compile_row_converter(schema, [3]) is converter
+    assert converter(['1', '', '2015-01-01', {'chars': 560}]) == \
+        [1, None, datetime.date(2015, 1, 1), '{"chars": 560}']
+    assert converter([1, 'name', datetime.date(2015, 1, 1), '{}']) == \
+        [1, 'name', datetime.date(2015, 1, 1), '{}']
+    with pytest.raises(tableschema.exceptions.StorageError):
+        converter([1, 'name', datetime.date(2015, 1, 1), '{}', 'EXTRA'])
+    with pytest.raises(tableschema.exceptions.StorageError):
+        mapper.convert_row([1, 'name'], schema, [3])
+
+
+def test_mapper_compile_row_converter_trusting():
+    mapper = Mapper('prefix_')
+    schema = tableschema.Schema({'fields': [
+        {'name': 'id', 'type': 'integer'},
+        {'name': 'stats', 'type': 'object'},
+    ]})
+    converter = mapper.compile_row_converter(schema, [1], cast=False, validate_every=2)
+    assert mapper.compile_row_converter(schema, [1], cast=False, validate_every=2) is converter
+    assert mapper.compile_row_converter(schema, [1]) is not converter
+    converter = mapper.compile_row_converter(schema, [1], cast=False, validate_every=2)
+    assert converter(['1', {'chars': 560}]) == [1, '{"chars": 560}']
+    assert converter(['bad', {'chars': 970}]) == ['bad', '{"chars": 970}']
+    with pytest.raises(tableschema.exceptions.CastError):
+        converter(['bad', {'chars': 970}])
+    with pytest.raises(tableschema.exceptions.StorageError):
+        converter([1, {'chars': 970}, 'EXTRA'])
+
+
+def test_mapper_restore_rows():
+    mapper = Mapper('prefix_')
+    schema = tableschema.Schema({'fields': [
+        {'name': 'id', 'type': 'integer'},
+        {'name': 'rating', 'type': 'number'},
+        {'name': 'current', 'type': 'boolean'},
+        {'name': 'datetime', 'type': 'datetime'},
+        {'name': 'date', 'type': 'date'},
+        {'name': 'time', 'type': 'time'},
+    ]})
+    rows = [
+        ['1', '9.5', 'true', '2015-01-01T03:00:00.5', '2015-01-01', '15:45:33'],
+        ['2', None, 'false', '1.4201E9', None, '03:00:00.000001'],
+    ]
+    restored = [
+        [1, Decimal('9.5'), True, datetime.datetime(2015, 1, 1, 3, 0, 0, 500000),
+         datetime.date(2015, 1, 1), datetime.time(15, 45, 33)],
+        [2, None, False, datetime.datetime(2015, 1, 1, 8, 13, 20),
+         None, datetime.time(3, 0, 0, 1)],
+    ]
+    assert mapper.restore_rows(rows, schema) == restored
+    assert mapper.restore_rows(rows, schema, validate=False) == restored
+    assert mapper.restore_row(rows[0], schema) == restored[0]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import io
+from tableschema_bigquery import LocalSink
+
+
+# Tests
+
+def test_local_sink(tmpdir):
+    sink = LocalSink(str(tmpdir))
+    os.makedirs(str(tmpdir.join('bucket', 'path')))
+    for name in ['data-000000000001.csv', 'data-000000000000.csv', 'other.csv']:
+        with io.open(str(tmpdir.join('bucket', 'path', name)), 'wb') as file:
+            file.write(name.encode('utf-8'))
+    assert sink.list('gs://bucket/path/data-*.csv') == [
+        'gs://bucket/path/data-000000000000.csv',
+        'gs://bucket/path/data-000000000001.csv',
+    ]
+    with sink.open('gs://bucket/path/other.csv') as file:
+        assert file.read() == b'other.csv'
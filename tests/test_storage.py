@@ -148,6 +148,7 @@ def test_storage():
 
     # Assert schemas
     assert storage.describe('articles') == ARTICLES['schema']
+    assert storage.describe(['articles', 'compound'])[0] == ARTICLES['schema']
     assert storage.describe('comments') == {
         'fields': [
             {'name': 'entry_id', 'type': 'integer', 'constraints': {'required': True}},
@@ -179,22 +180,26 @@ def test_storage():
         ],
     }
 
-    assert storage.read('articles') == cast(ARTICLES)['data']
-    assert storage.read('comments') == cast(COMMENTS)['data']
-    assert storage.read('temporal') == cast(TEMPORAL, skip=['duration', 'yearmonth'])['data']
-    assert storage.read('location') == cast(LOCATION, skip=['geojson', 'geopoint'])['data']
-    assert storage.read('compound') == cast(COMPOUND, skip=['array', 'object'])['data']
+    assert sort(storage.read('articles')) == cast(ARTICLES)['data']
+    assert sort(storage.read('comments')) == cast(COMMENTS)['data']
+    assert sort(storage.read('temporal')) == cast(TEMPORAL, skip=['duration', 'yearmonth'])['data']
+    assert sort(storage.read('location')) == cast(LOCATION, skip=['geojson', 'geopoint'])['data']
+    assert sort(storage.read('compound')) == cast(COMPOUND, skip=['array', 'object'])['data']
 
     # Assert data with forced schema
     storage.describe('compound', COMPOUND['schema'])
-    assert storage.read('compound') == cast(COMPOUND)['data']
+    assert sort(storage.read('compound')) == cast(COMPOUND)['data']
 
     # Delete non existent bucket
     with pytest.raises(tableschema.exceptions.StorageError):
         storage.delete('non_existent')
 
+    # Delete non existent bucket ignoring errors
+    storage.delete(['non_existent', 'articles'], ignore=True)
+    assert storage.buckets == ['comments', 'compound', 'location', 'temporal']
+
     # Delete buckets
-    storage.delete()
+    storage.delete(workers=4)
 
 
 def test_storage_bigdata():
@@ -210,15 +215,70 @@ def test_storage_bigdata():
     # Write data
     storage = Storage(SERVICE, project=PROJECT, dataset=DATASET, prefix=PREFIX)
     storage.create('bucket', RESOURCE['schema'], force=True)
-    storage.write('bucket', RESOURCE['data'])
+    storage.write('bucket', RESOURCE['data'], max_jobs=2, chunk_rows=5000)
 
     # Pull rows
-    # TODO: remove sorting after proper soring solution implementation
-    assert sorted(storage.read('bucket'), key=lambda row: row[0]) == RESOURCE['data']
+    assert sort(storage.read('bucket')) == RESOURCE['data']
+
+    # Pull rows page by page
+    assert sort(storage.read('bucket', page_size=1000)) == RESOURCE['data']
+    assert len(storage.read('bucket', page_size=1000, start_index=14000)) == 1000
+
+    # Pull rows in parallel
+    assert sort(storage.read('bucket', page_size=1000, workers=4)) == RESOURCE['data']
+    assert sort(storage.read('bucket', workers=4, preserve_order=False)) == RESOURCE['data']
+
+    # Pull sorted rows
+    assert storage.read('bucket', sort='query') == RESOURCE['data']
+    assert storage.read('bucket', sort='merge', sort_buffer=1000) == RESOURCE['data']
+
+    # Query rows
+    rows = storage.query('bucket', fields=['id'], where='id >= @min', params={'min': 14990},
+                         order_by='id DESC', limit=5)
+    assert list(rows) == [[14999], [14998], [14997], [14996], [14995]]
+
+
+def test_storage_write_formats():
+
+    # Write and read data for every format
+    storage = Storage(SERVICE, project=PROJECT, dataset=DATASET, prefix=PREFIX)
+    for format in ['csv', 'json', 'avro']:
+        storage.create(format, ARTICLES['schema'], force=True)
+        storage.write(format, deepcopy(ARTICLES['data']), format=format)
+        assert sort(storage.read(format)) == cast(ARTICLES)['data']
+        storage.delete(format)
+
+
+def test_storage_write_stream():
+
+    # Write and read data with streaming inserts
+    storage = Storage(SERVICE, project=PROJECT, dataset=DATASET, prefix=PREFIX)
+    storage.create('stream', ARTICLES['schema'], force=True)
+    storage.write('stream', deepcopy(ARTICLES['data']), method='stream')
+    assert sort(storage.read('stream')) == cast(ARTICLES)['data']
+    storage.delete('stream')
+
+
+def test_storage_write_modes():
+
+    # Truncate and upsert data
+    storage = Storage(SERVICE, project=PROJECT, dataset=DATASET, prefix=PREFIX)
+    descriptor = dict(ARTICLES['schema'], primaryKey='id')
+    storage.create('modes', descriptor, force=True)
+    storage.write('modes', deepcopy(ARTICLES['data']))
+    storage.write('modes', deepcopy(ARTICLES['data']), mode='truncate')
+    assert sort(storage.read('modes')) == cast(ARTICLES)['data']
+    storage.write('modes', [['2', '', 'Updated', 'True', '1']], mode='upsert')
+    assert sort(storage.read('modes'))[1][2] == 'Updated'
+    storage.delete('modes')
 
 
 # Helpers
 
+def sort(rows):
+    return sorted(rows, key=lambda row: row[0] if row[0] is not None else 'null')
+
+
 def cast(resource, skip=[]):
     resource = deepcopy(resource)
     schema = tableschema.Schema(resource['schema'])
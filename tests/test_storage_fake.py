@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pytest
+import datetime
+import tableschema
+from copy import deepcopy
+from dateutil import tz
+from apiclient.errors import HttpError
+from tableschema_bigquery import Storage, LocalSink, MetadataCache, MetricsTracer
+from .benchmark import benchmark
+from .fake import FakeService
+
+
+# Resources
+
+ARTICLES = {
+    'schema': {
+        'fields': [
+            {'name': 'id', 'type': 'integer', 'constraints': {'required': True}},
+            {'name': 'parent', 'type': 'integer'},
+            {'name': 'name', 'type': 'string'},
+            {'name': 'current', 'type': 'boolean'},
+            {'name': 'rating', 'type': 'number'},
+        ],
+    },
+    'data': [
+        ['1', '', 'Taxes', 'True', '9.5'],
+        ['2', '1', '中国人', 'False', '7'],
+    ],
+}
+NUMBERS = {
+    'schema': {
+        'fields': [
+            {'name': 'id', 'type': 'integer'},
+        ],
+    },
+    'data': [[value] for value in range(0, 1500)],
+}
+TEXTS = {
+    'schema': {
+        'fields': [
+            {'name': 'id', 'type': 'integer'},
+            {'name': 'text', 'type': 'string'},
+        ],
+    },
+    'data': [[value, 'x' * 200] for value in range(0, 3000)],
+}
+
+
+# Tests
+
+def test_storage_fake():
+    service = FakeService(job_polls=2)
+    storage = Storage(service, project='project', dataset='dataset', prefix='prefix_')
+    storage.create(['articles', 'numbers'], [ARTICLES['schema'], NUMBERS['schema']])
+    storage.write('articles', deepcopy(ARTICLES['data']))
+
+    # Reflect buckets
+    storage = Storage(service, project='project', dataset='dataset', prefix='prefix_')
+    assert storage.buckets == ['articles', 'numbers']
+    assert storage.describe('articles') == ARTICLES['schema']
+    assert storage.read('articles') == cast(ARTICLES)['data']
+
+    # Create existent bucket
+    with pytest.raises(tableschema.exceptions.StorageError):
+        storage.create('articles', ARTICLES['schema'])
+
+    # Delete buckets
+    storage.delete('articles')
+    assert storage.buckets == ['numbers']
+    storage.delete(['non_existent', 'numbers'], ignore=True)
+    assert storage.buckets == []
+
+
+def test_storage_fake_create_partitioned():
+    service = FakeService()
+    storage = Storage(service, project='project', dataset='dataset')
+    descriptor = {'fields': [
+        {'name': 'id', 'type': 'integer'},
+        {'name': 'date', 'type': 'date'},
+    ]}
+    storage.create('bucket', descriptor, partitioning='date', clustering=['id'])
+    resource = service.tables_[('project', 'dataset', 'bucket')]['resource']
+    assert resource['timePartitioning'] == {'field': 'date', 'type': 'DAY'}
+    assert resource['clustering'] == {'fields': ['id']}
+    storage.write('bucket', [[1, '2020-01-01']], mode='truncate')
+    assert storage.read('bucket') == [[1, datetime.date(2020, 1, 1)]]
+    with pytest.raises(tableschema.exceptions.StorageError):
+        storage.create('other', descriptor, partitioning='id')
+    assert storage.buckets == ['bucket']
+
+
+def test_storage_fake_buckets_pagination():
+    service = FakeService()
+    storage = Storage(service, project='project', dataset='dataset', batch_size=None)
+    buckets = ['bucket%03d' % index for index in range(120)]
+    storage.create(buckets, [NUMBERS['schema']] * len(buckets))
+    storage = Storage(service, project='project', dataset='dataset')
+    assert storage.buckets == buckets
+
+
+def test_storage_fake_cache_path(tmpdir):
+    service = FakeService()
+    path = str(tmpdir.join('cache.json'))
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.create(['bucket1', 'bucket2'], [NUMBERS['schema']] * 2)
+    storage = Storage(service, project='project', dataset='dataset',
+                      cache=MetadataCache(ttl=60, path=path))
+    storage.describe(['bucket1', 'bucket2'])
+
+    # Other processes start warm
+    calls = service.calls
+    storage = Storage(service, project='project', dataset='dataset',
+                      cache=MetadataCache(ttl=60, path=path))
+    assert storage.describe(['bucket1', 'bucket2']) == [NUMBERS['schema']] * 2
+    assert service.calls == calls
+
+
+def test_storage_fake_bigdata():
+    service = FakeService(page_size=100)
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.create('bucket', NUMBERS['schema'])
+    storage.write('bucket', NUMBERS['data'], max_jobs=2, chunk_rows=400)
+    assert sort(storage.read('bucket')) == NUMBERS['data']
+    assert len(storage.read('bucket', page_size=50, start_index=1400)) == 100
+    assert sort(storage.read('bucket', page_size=100, workers=4)) == NUMBERS['data']
+    assert storage.read('bucket', sort='query') == NUMBERS['data']
+    assert storage.read('bucket', sort='merge', sort_buffer=100) == NUMBERS['data']
+    rows = storage.query('bucket', fields=['id'], where='id >= @min', params={'min': 1490},
+                         order_by='id DESC', limit=3)
+    assert list(rows) == [[1499], [1498], [1497]]
+
+
+def test_storage_fake_read_retries():
+    service = FakeService(page_size=100)
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.create('bucket', NUMBERS['schema'])
+    storage.write('bucket', NUMBERS['data'])
+    service.request_errors = 3
+    assert sort(storage.read('bucket', workers=2)) == NUMBERS['data']
+    service.request_errors = 3
+    assert storage.read('bucket', sort='query') == NUMBERS['data']
+
+    # Not retried
+    service.request_errors = 1
+    storage = Storage(service, project='project', dataset='dataset', num_retries=0)
+    with pytest.raises(HttpError):
+        storage.read('bucket')
+
+
+def test_storage_fake_query_params():
+    service = FakeService()
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.create('bucket', NUMBERS['schema'])
+    storage.write('bucket', NUMBERS['data'])
+    moment = datetime.datetime(2020, 1, 1, tzinfo=tz.tzutc())
+    rows = storage.query('bucket', where='id = @id', params={'id': None, 'moment': moment})
+    assert list(rows) == []
+    parameters = sorted(service.queries[-1]['queryParameters'], key=lambda item: item['name'])
+    assert parameters == [
+        {'name': 'id', 'parameterType': {'type': 'INT64'}, 'parameterValue': {}},
+        {'name': 'moment', 'parameterType': {'type': 'TIMESTAMP'},
+         'parameterValue': {'value': '2020-01-01 00:00:00+00:00'}},
+    ]
+
+    rows = storage.query('bucket', where='@id <= id', params={'id': None})
+    assert list(rows) == []
+    assert service.queries[-1]['queryParameters'][0]['parameterType'] == {'type': 'INT64'}
+
+    # Explicit types
+    rows = storage.query('bucket', where='id < @id', params={'id': ('FLOAT64', 2)})
+    assert list(rows) == [[0], [1]]
+    rows = storage.query('bucket', where='id >= @id', params={'id': ('INT64', '1498')})
+    assert list(rows) == [[1498], [1499]]
+    with pytest.raises(tableschema.exceptions.StorageError) as excinfo:
+        list(storage.query('bucket', where='id = @id', params={'id': ('STRING', None)}))
+    assert 'No matching signature' in str(excinfo.value)
+
+    # Order
+    assert list(storage.query('bucket', order_by='id desc', limit=1)) == [[1499]]
+    with pytest.raises(tableschema.exceptions.StorageError):
+        list(storage.query('bucket', order_by='id DESC, (SELECT 1)'))
+
+
+@pytest.mark.parametrize('format', ['csv', 'json'])
+def test_storage_fake_write_formats(format):
+    storage = Storage(FakeService(), project='project', dataset='dataset')
+    storage.create('bucket', ARTICLES['schema'])
+    storage.write('bucket', deepcopy(ARTICLES['data']), format=format)
+    assert storage.read('bucket') == cast(ARTICLES)['data']
+
+
+def test_storage_fake_write_trusted():
+    storage = Storage(FakeService(), project='project', dataset='dataset')
+    storage.create('bucket', ARTICLES['schema'])
+    data = cast(ARTICLES)['data']
+    storage.write('bucket', deepcopy(data), cast=False, validate_every=10)
+    assert storage.read('bucket') == data
+    with pytest.raises(tableschema.exceptions.CastError):
+        storage.write('bucket', [['bad', None, None, None, None]], cast=False, validate_every=10)
+
+
+@pytest.mark.parametrize('format', ['csv', 'json'])
+def test_storage_fake_write_processes(format):
+    tracer = MetricsTracer()
+    storage = Storage(FakeService(), project='project', dataset='dataset', tracer=tracer)
+    storage.create('bucket', NUMBERS['schema'])
+    storage.write('bucket', NUMBERS['data'], chunk_rows=400, format=format, processes=2)
+    assert sort(storage.read('bucket')) == NUMBERS['data']
+    assert tracer.metrics['storage.upload']['count'] == 4
+    storage.write('bucket', [], mode='truncate', processes=2)
+    assert storage.read('bucket') == []
+
+
+def test_storage_fake_write_resumable():
+    tracer = MetricsTracer()
+    service = FakeService(upload_errors=1)
+    storage = Storage(service, project='project', dataset='dataset', tracer=tracer,
+                      spool_size=1024, upload_chunk_size=256 * 1024)
+    storage.create('bucket', TEXTS['schema'])
+    storage.write('bucket', TEXTS['data'])
+    assert storage.read('bucket') == TEXTS['data']
+    assert tracer.metrics['storage.upload']['requests'] == 3
+    assert service.uploads == 4
+
+    # Not retried
+    service.upload_errors = 1
+    storage = Storage(service, project='project', dataset='dataset', num_retries=0)
+    with pytest.raises(HttpError):
+        storage.write('bucket', TEXTS['data'])
+
+
+def test_storage_fake_write_failed_job():
+    service = FakeService(job_polls=1)
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.create('bucket', NUMBERS['schema'])
+    rows = [[value] for value in range(1000)]
+    rows[150] = ['bad']
+    with pytest.raises(tableschema.exceptions.StorageError) as excinfo:
+        storage.write('bucket', rows, max_jobs=1, chunk_rows=100, cast=False)
+    assert 'invalid literal' in str(excinfo.value)
+
+    # Sending stops after the failed job
+    assert len(service.jobs_) == 2
+
+
+def test_storage_fake_write_stream():
+    storage = Storage(FakeService(), project='project', dataset='dataset')
+    storage.create('bucket', ARTICLES['schema'])
+    storage.write('bucket', deepcopy(ARTICLES['data']), method='stream')
+    assert storage.read('bucket') == cast(ARTICLES)['data']
+
+
+def test_storage_fake_write_stream_read_parallel():
+    storage = Storage(FakeService(page_size=100), project='project', dataset='dataset')
+    storage.create('bucket', NUMBERS['schema'])
+    storage.write('bucket', NUMBERS['data'][:500])
+    storage.write('bucket', NUMBERS['data'][500:], method='stream')
+    assert storage.read('bucket', page_size=100, workers=4) == NUMBERS['data']
+    assert storage.read('bucket', start_index=1400, workers=4) == NUMBERS['data'][1400:]
+
+
+def test_storage_fake_write_modes():
+    service = FakeService()
+    storage = Storage(service, project='project', dataset='dataset', prefix='prefix_')
+    descriptor = {'fields': ARTICLES['schema']['fields'], 'primaryKey': 'id'}
+    storage.create('bucket', descriptor)
+    storage.write('bucket', deepcopy(ARTICLES['data']))
+    storage.write('bucket', deepcopy(ARTICLES['data']), chunk_rows=1)
+    assert len(storage.read('bucket')) == 4
+
+    # Truncate
+    storage.write('bucket', deepcopy(ARTICLES['data']), chunk_rows=1, mode='truncate')
+    assert storage.read('bucket') == cast(ARTICLES)['data']
+
+    def rows():
+        yield ['3', '', 'New', '', '']
+        raise RuntimeError('Source failed')
+    with pytest.raises(RuntimeError):
+        storage.write('bucket', rows(), chunk_rows=1, mode='truncate')
+    assert storage.read('bucket') == cast(ARTICLES)['data']
+    storage.write('bucket', [], mode='truncate')
+    assert storage.read('bucket') == []
+
+    # Upsert
+    storage.write('bucket', deepcopy(ARTICLES['data']))
+    storage.write('bucket', [['2', '', 'Updated', 'True', '1'], ['3', '', 'New', '', '']],
+                  mode='upsert')
+    assert sort(storage.read('bucket')) == cast({'schema': descriptor, 'data': [
+        ['1', '', 'Taxes', 'True', '9.5'],
+        ['2', '', 'Updated', 'True', '1'],
+        ['3', '', 'New', '', ''],
+    ]})['data']
+    assert list(service.tables_) == [('project', 'dataset', 'prefix_bucket')]
+
+    # Not supported
+    with pytest.raises(tableschema.exceptions.StorageError):
+        storage.write('bucket', [], method='stream', mode='truncate')
+    storage.create('no_key', ARTICLES['schema'])
+    with pytest.raises(tableschema.exceptions.StorageError):
+        storage.write('no_key', [], mode='upsert')
+
+
+def test_storage_fake_write_truncate_schema():
+    service = FakeService()
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.create('bucket', {'fields': [
+        {'name': 'id', 'type': 'integer'},
+        {'name': 'moment', 'type': 'datetime'},
+    ]})
+    schema = {'fields': [
+        {'name': 'id', 'type': 'INTEGER', 'mode': 'NULLABLE', 'description': 'Identifier'},
+        {'name': 'moment', 'type': 'TIMESTAMP', 'mode': 'NULLABLE'},
+    ]}
+    table = service.tables_[('project', 'dataset', 'bucket')]
+    table['resource']['schema'] = deepcopy(schema)
+
+    # The live schema is kept
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.write('bucket', [[1, '2020-01-01T10:00:00Z']], mode='truncate')
+    assert table['resource']['schema'] == schema
+    assert len(table['rows']) == 1
+
+
+def test_storage_fake_write_staging_buckets():
+    service = FakeService()
+    storage = Storage(service, project='project', dataset='dataset')
+    storage.create('bucket', ARTICLES['schema'])
+    listed = []
+
+    def rows():
+        for row in deepcopy(ARTICLES['data']):
+            listed.append(storage.buckets)
+            yield row
+
+    # Staging tables are not buckets
+    storage.write('bucket', rows(), chunk_rows=1, mode='truncate')
+    assert listed == [['bucket'], ['bucket']]
+    storage.delete()
+    assert storage.buckets == []
+
+
+def test_storage_fake_export(tmpdir):
+    sink = LocalSink(str(tmpdir))
+    storage = Storage(FakeService(sink=sink, shard_size=500), project='project', dataset='dataset')
+    storage.create('bucket', NUMBERS['schema'])
+    storage.write('bucket', NUMBERS['data'])
+    rows = storage.export('bucket', 'gs://bucket/numbers-*.csv', sink=sink)
+    assert list(rows) == NUMBERS['data']
+
+
+def test_storage_fake_tracer():
+    tracer = MetricsTracer()
+    storage = Storage(FakeService(job_polls=1), project='project', dataset='dataset',
+                      tracer=tracer)
+    storage.create('bucket', NUMBERS['schema'])
+    storage.write('bucket', NUMBERS['data'], chunk_rows=1000)
+    storage.read('bucket', page_size=500)
+    metrics = tracer.metrics
+    assert metrics['storage.write']['chunks'] == 2
+    assert metrics['storage.encode']['rows'] == 1500
+    assert metrics['storage.upload']['count'] == 2
+    assert metrics['storage.upload']['bytes'] == metrics['storage.encode']['bytes']
+    assert metrics['storage.wait']['jobs'] == 2
+    assert metrics['storage.wait']['polls'] >= 2
+    assert metrics['storage.fetch']['rows'] == 1500
+    assert metrics['storage.restore']['rows'] == 1500
+    assert metrics['storage.read']['rows'] == 1500
+
+
+def test_storage_fake_benchmark():
+    results = benchmark(sizes=[100], widths=[6])
+    assert results[0]['rows'] == 100
+    assert results[0]['write_rows_per_sec'] > 0
+    assert results[0]['iter_rows_per_sec'] > 0
+
+
+# Helpers
+
+def sort(rows):
+    return sorted(rows, key=lambda row: row[0] if row[0] is not None else 'null')
+
+
+def cast(resource, skip=[]):
+    resource = deepcopy(resource)
+    schema = tableschema.Schema(resource['schema'])
+    for row in resource['data']:
+        for index, field in enumerate(schema.fields):
+            if field.type not in skip:
+                row[index] = field.cast_value(row[index])
+    return resource
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pytest
+from tableschema_bigquery import MetricsTracer
+
+
+# Tests
+
+def test_metrics_tracer():
+    spans = []
+    tracer = MetricsTracer(callback=lambda *args: spans.append(args))
+    for rows in [10, 20]:
+        with tracer.start_as_current_span('fetch', attributes={'table': 'name'}) as span:
+            span.set_attribute('rows', rows)
+    metrics = tracer.metrics
+    assert metrics['fetch']['count'] == 2
+    assert metrics['fetch']['errors'] == 0
+    assert metrics['fetch']['rows'] == 30
+    assert 'table' not in metrics['fetch']
+    assert metrics['fetch']['seconds'] >= metrics['fetch']['max_seconds']
+    assert [(name, attributes) for name, _, attributes in spans] == [
+        ('fetch', {'table': 'name', 'rows': 10}),
+        ('fetch', {'table': 'name', 'rows': 20}),
+    ]
+
+
+def test_metrics_tracer_error():
+    tracer = MetricsTracer()
+    with pytest.raises(ValueError):
+        with tracer.start_as_current_span('upload'):
+            raise ValueError('Bad request')
+    assert tracer.metrics['upload']['errors'] == 1
+    tracer.reset()
+    assert tracer.metrics == {}
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pytest
+import httplib2
+from concurrent.futures import ThreadPoolExecutor
+from tableschema_bigquery.transport import HttpPool, create_http_pool
+from .fake import FakeService
+
+
+# Tests
+
+def test_http_pool_get():
+    pool = HttpPool(object)
+    assert pool.get() is pool.get()
+    assert len(pool) == 1
+
+
+def test_http_pool_get_threads():
+    pool = HttpPool(object)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        https = list(executor.map(lambda _: pool.get(), range(100)))
+    assert len(set(map(id, https))) == len(pool)
+    assert 1 <= len(pool) <= 4
+
+
+def test_create_http_pool_google_auth():
+    google_auth_httplib2 = pytest.importorskip('google_auth_httplib2')
+    credentials = pytest.importorskip('google.auth.credentials').AnonymousCredentials()
+    service = Service(google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http()))
+    pool = create_http_pool(service)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        https = list(executor.map(lambda _: pool.get(), range(2)))
+    for http in https:
+        assert isinstance(http, google_auth_httplib2.AuthorizedHttp)
+        assert http.credentials is credentials
+        assert http is not service._http
+    assert len(pool) >= 1
+
+
+def test_create_http_pool_oauth2client():
+    client = pytest.importorskip('oauth2client.client')
+    credentials = client.AccessTokenCredentials('token', 'agent')
+    service = Service(credentials.authorize(httplib2.Http()))
+    http = create_http_pool(service).get()
+    assert http.request.credentials is credentials
+    assert http is not service._http
+
+
+def test_create_http_pool_not_authorized():
+    assert isinstance(create_http_pool(Service(httplib2.Http())).get(), httplib2.Http)
+    assert create_http_pool(FakeService()) is None
+
+
+# Helpers
+
+class Service(object):
+
+    def __init__(self, http):
+        self._http = http